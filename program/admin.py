@@ -4,35 +4,48 @@ from urllib.parse import quote
 import requests
 from django.contrib import admin
 from django.core.files.base import ContentFile
-from django.db import transaction
+from django.urls import reverse
 from django.utils.html import format_html
 
-from program import pretalx, pretalx_sync
-from program.models import Room, Slot, Speaker, Talk, Utility, Workshop
+from program import jobs, pretalx, pretalx_sync, schedule_snapshot
+from program.models import Room, Slot, Speaker, SyncJob, Talk, Utility, Workshop
 
 
-def create_pretalx_sync() -> pretalx_sync.PretalxSync:
-    client = pretalx.create_pretalx_client()
+def create_pretalx_sync(event_slug: str | None = None) -> pretalx_sync.PretalxSync:
+    client = pretalx.create_pretalx_client(event_slug)
     return pretalx_sync.PretalxSync(client)
 
 
+def enqueue_update_from_pretalx(modeladmin, request, queryset, kind: str) -> None:
+    job = jobs.enqueue(kind, queryset.values_list("id", flat=True))
+    job_url = reverse("admin:program_syncjob_change", args=[job.id])
+    modeladmin.message_user(
+        request,
+        format_html(
+            'Update from pretalx has been scheduled, see <a href="{}">{}</a>.',
+            job_url,
+            job,
+        ),
+    )
+
+
 @admin.action(description="Make public")
 def make_public(self, request, queryset):
     queryset.update(is_public=True)
+    schedule_snapshot.invalidate()
     self.message_user(request, "Selected items have been made public.")
 
 
 @admin.action(description="Make not public")
 def make_not_public(self, request, queryset):
     queryset.update(is_public=False)
+    schedule_snapshot.invalidate()
     self.message_user(request, "Selected items have been made not public.")
 
 
 @admin.action(description="Update from pretalx")
 def speaker_update_from_pretalx(modeladmin, request, queryset):
-    sync = create_pretalx_sync()
-    with transaction.atomic():
-        sync.update_speakers(queryset)
+    enqueue_update_from_pretalx(modeladmin, request, queryset, "update_speakers")
 
 
 @admin.register(Speaker)
@@ -46,7 +59,7 @@ class SpeakerAdmin(admin.ModelAdmin):
         "pretalx_code",
     ]
     search_fields = ["full_name", "email", "pretalx_code"]
-    list_filter = ["is_public"]
+    list_filter = ["is_public", "pretalx_event"]
     ordering = ["order", "full_name"]
     fieldsets = [
         (
@@ -54,6 +67,7 @@ class SpeakerAdmin(admin.ModelAdmin):
             {
                 "fields": [
                     "pretalx_code",
+                    "pretalx_event",
                     "short_bio",
                     "bio",
                     "photo",
@@ -112,15 +126,13 @@ class SpeakerAdmin(admin.ModelAdmin):
         obj.save()
 
         if not change and obj.pretalx_code:
-            sync = create_pretalx_sync()
-            sync.update_speakers([obj])
+            with create_pretalx_sync(obj.pretalx_event) as sync:
+                sync.update_speakers([obj])
 
 
 @admin.action(description="Update from pretalx")
 def talk_update_from_pretalx(modeladmin, request, queryset):
-    sync = create_pretalx_sync()
-    with transaction.atomic():
-        sync.update_talks(queryset)
+    enqueue_update_from_pretalx(modeladmin, request, queryset, "update_talks")
 
 
 @admin.register(Talk)
@@ -136,7 +148,15 @@ class TalkAdmin(admin.ModelAdmin):
         "is_backup",
         "pretalx_code",
     ]
-    list_filter = ["is_keynote", "track", "type", "language", "is_public", "is_backup"]
+    list_filter = [
+        "is_keynote",
+        "track",
+        "type",
+        "language",
+        "is_public",
+        "is_backup",
+        "pretalx_event",
+    ]
     search_fields = ["title", "abstract", "talk_speakers__full_name", "pretalx_code"]
     ordering = ["is_backup", "-is_keynote", "track", "order", "title"]
     fieldsets = [
@@ -145,6 +165,7 @@ class TalkAdmin(admin.ModelAdmin):
             {
                 "fields": [
                     "pretalx_code",
+                    "pretalx_event",
                     "og_image",
                 ],
             },
@@ -242,8 +263,8 @@ class TalkAdmin(admin.ModelAdmin):
         obj.save()
 
         if not change and obj.pretalx_code:
-            sync = create_pretalx_sync()
-            sync.update_talks([obj])
+            with create_pretalx_sync(obj.pretalx_event) as sync:
+                sync.update_talks([obj])
 
     def _update_video_image(self, talk: Talk):
         video_id = talk.video_id
@@ -285,9 +306,7 @@ class TalkAdmin(admin.ModelAdmin):
 
 @admin.action(description="Update from pretalx")
 def workshop_update_from_pretalx(modeladmin, request, queryset):
-    sync = create_pretalx_sync()
-    with transaction.atomic():
-        sync.update_workshops(queryset)
+    enqueue_update_from_pretalx(modeladmin, request, queryset, "update_workshops")
 
 
 @admin.register(Workshop)
@@ -302,7 +321,15 @@ class WorkshopAdmin(admin.ModelAdmin):
         "is_backup",
         "pretalx_code",
     ]
-    list_filter = ["type", "track", "type", "language", "is_public", "is_backup"]
+    list_filter = [
+        "type",
+        "track",
+        "type",
+        "language",
+        "is_public",
+        "is_backup",
+        "pretalx_event",
+    ]
     search_fields = [
         "title",
         "abstract",
@@ -316,6 +343,7 @@ class WorkshopAdmin(admin.ModelAdmin):
             {
                 "fields": [
                     "pretalx_code",
+                    "pretalx_event",
                     "og_image",
                     "registration",
                     "length",
@@ -388,8 +416,8 @@ class WorkshopAdmin(admin.ModelAdmin):
         obj.save()
 
         if not change and obj.pretalx_code:
-            sync = create_pretalx_sync()
-            sync.update_workshops([obj])
+            with create_pretalx_sync(obj.pretalx_event) as sync:
+                sync.update_workshops([obj])
 
 
 @admin.register(Utility)
@@ -483,3 +511,60 @@ class SlotAdmin(admin.ModelAdmin):
         ),
     ]
     date_hierarchy = "start"
+
+
+@admin.register(SyncJob)
+class SyncJobAdmin(admin.ModelAdmin):
+    list_display = [
+        "__str__",
+        "status",
+        "progress_display",
+        "created_at",
+        "started_at",
+        "finished_at",
+    ]
+    list_filter = ["status", "kind"]
+    fields = [
+        "kind",
+        "status",
+        "progress_display",
+        "object_ids",
+        "pretalx_event",
+        "pretalx_codes",
+        "error",
+        "created_at",
+        "run_after",
+        "started_at",
+        "finished_at",
+    ]
+    readonly_fields = fields
+    change_list_template = "program/admin/change_list_sync_job.html"
+    change_form_template = "program/admin/change_form_sync_job.html"
+
+    def has_add_permission(self, request) -> bool:
+        return False
+
+    def has_change_permission(self, request, obj=None) -> bool:
+        return False
+
+    @admin.display(description="Progress")
+    def progress_display(self, job: SyncJob) -> str:
+        return f"{job.progress} / {job.total}"
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {
+            **(extra_context or {}),
+            "has_active_jobs": SyncJob.objects.filter(
+                status__in=["pending", "running"]
+            ).exists(),
+        }
+        return super().changelist_view(request, extra_context)
+
+    def change_view(self, request, object_id, form_url="", extra_context=None):
+        extra_context = {
+            **(extra_context or {}),
+            "has_active_jobs": SyncJob.objects.filter(
+                id=object_id, status__in=["pending", "running"]
+            ).exists(),
+        }
+        return super().change_view(request, object_id, form_url, extra_context)
@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class ProgramConfig(AppConfig):
     name = "program"
+
+    def ready(self) -> None:
+        from program import schedule_snapshot
+
+        schedule_snapshot.connect_signals()
@@ -0,0 +1,210 @@
+import datetime
+import itertools
+import logging
+import time
+from collections.abc import Iterable, Iterator
+
+from django.conf import settings
+from django.db import models as django_models
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from program import models, pretalx, pretalx_sync
+
+logger = logging.getLogger(__name__)
+
+JOB_CHUNK_SIZE = 50
+"""Number of objects synchronized in a single transaction of a job."""
+
+JOB_MODELS: dict[str, type[django_models.Model]] = {
+    "update_speakers": models.Speaker,
+    "update_talks": models.Talk,
+    "update_workshops": models.Workshop,
+}
+
+JOB_CODE_KINDS = {"sync_submissions", "sync_speakers"}
+"""Kinds of jobs synchronizing objects given by pretalx codes instead of IDs."""
+
+WEBHOOK_MAX_DELAY = datetime.timedelta(minutes=1)
+"""Maximum delay of a job created from webhooks, even when changes keep coming."""
+
+STALE_JOB_TIMEOUT = datetime.timedelta(hours=1)
+"""Running jobs started earlier are considered abandoned by a stopped worker."""
+
+
+def enqueue(kind: str, object_ids: Iterable[int]) -> models.SyncJob:
+    """Create a new pending job, it will be performed by the job worker."""
+    if kind not in JOB_MODELS:
+        raise ValueError(f"Unknown job kind: {kind!r}")
+
+    object_ids = sorted(set(object_ids))
+    return models.SyncJob.objects.create(
+        kind=kind,
+        object_ids=object_ids,
+        total=len(object_ids),
+    )
+
+
+def enqueue_changes(
+    kind: str, pretalx_codes: Iterable[str], event_slug: str | None = None
+) -> models.SyncJob:
+    """
+    Schedule synchronization of changed objects of the pretalx event
+    (``PRETALX_EVENT_SLUG`` by default) reported by the pretalx webhook.
+
+    Changes are debounced: the job is started ``PRETALX_WEBHOOK_DEBOUNCE`` seconds
+    after the last change, but not later than ``WEBHOOK_MAX_DELAY`` after the
+    first one. Changes arriving in the meantime are coalesced into the pending job.
+    """
+    if kind not in JOB_CODE_KINDS:
+        raise ValueError(f"Unknown job kind: {kind!r}")
+
+    event_slug = event_slug or settings.PRETALX_EVENT_SLUG
+    now = timezone.now()
+    debounce = datetime.timedelta(seconds=settings.PRETALX_WEBHOOK_DEBOUNCE)
+    with transaction.atomic():
+        job = (
+            models.SyncJob.objects.select_for_update()
+            .filter(kind=kind, status="pending", pretalx_event=event_slug)
+            .order_by("created_at", "id")
+            .first()
+        )
+        if job is None:
+            job = models.SyncJob(
+                kind=kind, pretalx_event=event_slug, run_after=now + debounce
+            )
+        else:
+            job.run_after = min(now + debounce, job.created_at + WEBHOOK_MAX_DELAY)
+
+        job.pretalx_codes = sorted(set(job.pretalx_codes).union(pretalx_codes))
+        job.total = len(job.pretalx_codes)
+        job.save()
+        return job
+
+
+def claim_next_job() -> models.SyncJob | None:
+    """
+    Mark the oldest pending job as running and return it. Locked jobs are
+    skipped, so more workers can run at the same time.
+    """
+    with transaction.atomic():
+        job = (
+            models.SyncJob.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", run_after__lte=timezone.now())
+            .order_by("run_after", "id")
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = "running"
+        job.started_at = timezone.now()
+        job.save(update_fields=["status", "started_at"])
+        return job
+
+
+def requeue_stale_jobs() -> int:
+    """
+    Return jobs left running by a stopped worker (``STALE_JOB_TIMEOUT`` after their
+    start) to the queue. Returns the number of requeued jobs.
+    """
+    return models.SyncJob.objects.filter(
+        status="running", started_at__lt=timezone.now() - STALE_JOB_TIMEOUT
+    ).update(status="pending", started_at=None)
+
+
+def run_job(job: models.SyncJob) -> None:
+    """
+    Perform the job in chunks, progress is saved after each chunk. A requeued job
+    continues after the saved progress.
+    """
+    if job.kind in JOB_CODE_KINDS:
+        items = job.pretalx_codes[job.progress :]
+    else:
+        items = job.object_ids[job.progress :]
+
+    try:
+        with pretalx.create_pretalx_client(job.pretalx_event) as client:
+            syncs: dict[str, pretalx_sync.PretalxSync] = {}
+            for chunk in _chunked(items, JOB_CHUNK_SIZE):
+                with transaction.atomic():
+                    _run_job_chunk(client, syncs, job.kind, chunk)
+                job.progress += len(chunk)
+                job.save(update_fields=["progress"])
+    except Exception as exc:
+        logger.exception("Job %s failed.", job)
+        job.status = "failed"
+        job.error = f"{type(exc).__name__}: {exc}"
+    else:
+        job.status = "done"
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "error", "finished_at"])
+
+
+def run_next_job() -> bool:
+    """Perform the oldest pending job. Returns False when there was none."""
+    job = claim_next_job()
+    if job is None:
+        return False
+
+    run_job(job)
+    return True
+
+
+def run_worker(poll_interval: float, once: bool = False) -> None:
+    """
+    Perform pending jobs, waiting ``poll_interval`` seconds when idle. Stale jobs
+    are requeued first. Errors (e.g. a lost database connection) are logged
+    and the worker keeps running.
+    """
+    stale_jobs_requeued = False
+    while True:
+        # Drop connections closed by the database or broken by a previous error,
+        # a new one is opened when needed.
+        close_old_connections()
+        try:
+            if not stale_jobs_requeued:
+                if requeued := requeue_stale_jobs():
+                    logger.warning("Requeued %d stale jobs.", requeued)
+                stale_jobs_requeued = True
+            if run_next_job():
+                continue
+        except Exception:
+            logger.exception("Job worker failed.")
+        if once:
+            return
+        time.sleep(poll_interval)
+
+
+def _run_job_chunk(
+    client: pretalx.PretalxClient,
+    syncs: dict[str, pretalx_sync.PretalxSync],
+    kind: str,
+    items: list[int] | list[str],
+) -> None:
+    """
+    Synchronize one chunk of the job. ``syncs`` keeps ``PretalxSync`` of each event
+    between chunks, clients of other events than the job's one share connections
+    with ``client``.
+    """
+    if kind in JOB_CODE_KINDS:
+        objects_by_event = {client.event_slug: items}
+    else:
+        # Selected objects may belong to different events.
+        objects_by_event = {}
+        for obj in JOB_MODELS[kind].objects.filter(id__in=items):
+            objects_by_event.setdefault(obj.pretalx_event, []).append(obj)
+
+    for event_slug, event_items in objects_by_event.items():
+        if event_slug not in syncs:
+            syncs[event_slug] = pretalx_sync.PretalxSync(client.for_event(event_slug))
+        # PretalxSync.sync_submissions() or sync_speakers() with pretalx codes,
+        # update_speakers(), update_talks() or update_workshops() with objects.
+        getattr(syncs[event_slug], kind)(event_items)
+
+
+def _chunked(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
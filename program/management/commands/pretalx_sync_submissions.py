@@ -1,10 +1,125 @@
-from django.core.management.base import BaseCommand
+import json
+from argparse import ArgumentParser
+from pathlib import Path
 
-from program import pretalx, pretalx_sync
+import sentry_sdk
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from program import pretalx, pretalx_sync, sync_plan
 
 
 class Command(BaseCommand):
-    def handle(self, *args, **options):
-        pretalx_client = pretalx.create_pretalx_client()
-        sync = pretalx_sync.PretalxSync(pretalx_client)
-        sync.full_sync()
+    help = "Synchronize speakers, talks and workshops from pretalx."
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Skip submissions and speakers that did not change since last sync.",
+        )
+        parser.add_argument(
+            "--concurrent-fetch",
+            action="store_true",
+            help="Download submissions and speakers at the same time.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help=(
+                "Do not write to the database, print planned changes as JSON "
+                "(or save them to --plan-file)."
+            ),
+        )
+        parser.add_argument(
+            "--plan-file",
+            type=Path,
+            help="File to save the plan of a dry run to.",
+        )
+        parser.add_argument(
+            "--apply-plan",
+            type=Path,
+            metavar="PLAN_FILE",
+            help="Apply changes from a plan saved by a dry run, pretalx is not called.",
+        )
+        parser.add_argument(
+            "--event",
+            action="append",
+            dest="events",
+            metavar="SLUG",
+            help=(
+                "Slug of the pretalx event to synchronize, can be repeated "
+                "(defaults to PRETALX_EVENT_SLUG)."
+            ),
+        )
+
+    def handle(
+        self,
+        incremental: bool,
+        concurrent_fetch: bool,
+        dry_run: bool,
+        plan_file: Path | None,
+        apply_plan: Path | None,
+        events: list[str] | None,
+        *args,
+        **options,
+    ):
+        if apply_plan is not None and dry_run:
+            raise CommandError("--apply-plan cannot be combined with --dry-run.")
+        if plan_file is not None and not dry_run:
+            raise CommandError("--plan-file can be used only with --dry-run.")
+        if events and (dry_run or apply_plan is not None) and len(events) > 1:
+            raise CommandError("A plan can be made or applied for one event only.")
+
+        plan = None
+        if apply_plan is not None:
+            plan = sync_plan.SyncPlan.from_json(apply_plan.read_text())
+            if events and events != [plan.event_slug]:
+                raise CommandError(
+                    f"The plan was made for the event {plan.event_slug!r}."
+                )
+            events = [plan.event_slug]
+        events = events or [settings.PRETALX_EVENT_SLUG]
+
+        summaries = {}
+        with sentry_sdk.start_transaction(
+            op="pretalx.sync", name="pretalx_sync_submissions"
+        ), pretalx.create_pretalx_client(events[0]) as pretalx_client:
+            for event_slug in events:
+                # Clients of other events share the connection pool.
+                event_client = pretalx_client.for_event(event_slug)
+                with sentry_sdk.start_span(
+                    op="pretalx.sync.event", description=event_slug
+                ):
+                    sync = pretalx_sync.PretalxSync(event_client)
+                    with sync.metrics.count_queries():
+                        if apply_plan is not None:
+                            with transaction.atomic():
+                                sync.apply_plan(plan)
+                        else:
+                            if dry_run:
+                                plan = sync_plan.SyncPlan(event_slug=event_slug)
+                            sync.full_sync(
+                                incremental=incremental,
+                                concurrent_fetch=concurrent_fetch,
+                                plan=plan,
+                            )
+                    sync.metrics.report_to_sentry()
+                summaries[event_slug] = sync.metrics.to_dict()
+
+        summary = json.dumps(summaries, indent=2)
+        if not dry_run:
+            self.stdout.write(summary)
+        elif plan_file is not None:
+            plan_file.write_text(plan.to_json())
+            self.stdout.write(summary)
+            self.stdout.write(
+                f"Planned {len(plan.changes)} changes of objects and "
+                f"{len(plan.speakers_changes)} changes of speakers, "
+                f"saved to {plan_file}."
+            )
+        else:
+            # Keep the standard output clean for the plan.
+            self.stderr.write(summary)
+            self.stdout.write(plan.to_json())
@@ -0,0 +1,25 @@
+from argparse import ArgumentParser
+
+from django.core.management.base import BaseCommand
+
+from program import jobs
+
+
+class Command(BaseCommand):
+    help = "Perform background jobs synchronizing data from pretalx."
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Perform pending jobs and exit instead of waiting for new ones.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait between checks for new jobs (default: 2).",
+        )
+
+    def handle(self, once: bool, poll_interval: float, *args, **options):
+        jobs.run_worker(poll_interval=poll_interval, once=once)
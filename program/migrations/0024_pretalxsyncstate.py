@@ -0,0 +1,33 @@
+# Generated by Django 4.2.1 on 2026-10-18 14:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("program", "0023_talk_slides"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PretalxSyncState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("event_slug", models.CharField(max_length=100, unique=True)),
+                ("last_synced_at", models.DateTimeField(blank=True, null=True)),
+                ("submission_hashes", models.JSONField(blank=True, default=dict)),
+                ("speaker_hashes", models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                "verbose_name": "pretalx sync state",
+            },
+        ),
+    ]
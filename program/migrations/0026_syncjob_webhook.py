@@ -0,0 +1,47 @@
+# Generated by Django 4.2.1 on 2026-10-18 15:08
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("program", "0025_syncjob"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="syncjob",
+            name="program_syn_status_7691f1_idx",
+        ),
+        migrations.AddField(
+            model_name="syncjob",
+            name="pretalx_codes",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name="syncjob",
+            name="run_after",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name="syncjob",
+            name="kind",
+            field=models.CharField(
+                choices=[
+                    ("update_speakers", "Update speakers"),
+                    ("update_talks", "Update talks"),
+                    ("update_workshops", "Update workshops"),
+                    ("sync_submissions", "Sync changed submissions"),
+                    ("sync_speakers", "Sync changed speakers"),
+                ],
+                max_length=32,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="syncjob",
+            index=models.Index(
+                fields=["status", "run_after"], name="program_syn_status_dff5e6_idx"
+            ),
+        ),
+    ]
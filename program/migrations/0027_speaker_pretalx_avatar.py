@@ -0,0 +1,22 @@
+# Generated by Django 4.2.1 on 2026-10-18 15:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("program", "0026_syncjob_webhook"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="speaker",
+            name="pretalx_avatar_hash",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="speaker",
+            name="pretalx_avatar_url",
+            field=models.URLField(blank=True, editable=False, max_length=500),
+        ),
+    ]
@@ -0,0 +1,121 @@
+# Generated by Django 4.2.1 on 2026-10-18 15:19
+
+from django.db import migrations, models
+
+import program.models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("program", "0027_speaker_pretalx_avatar"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="speaker",
+            name="pretalx_event",
+            field=models.CharField(
+                blank=True,
+                # Existing rows belong to the event synced before events were tracked.
+                default="pycon-cz-23",
+                help_text="slug of the pretalx event, codes are unique within an event",
+                max_length=100,
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="syncjob",
+            name="pretalx_event",
+            field=models.CharField(blank=True, default="", max_length=100),
+        ),
+        migrations.AddField(
+            model_name="talk",
+            name="pretalx_event",
+            field=models.CharField(
+                blank=True,
+                # Existing rows belong to the event synced before events were tracked.
+                default="pycon-cz-23",
+                help_text="slug of the pretalx event, codes are unique within an event",
+                max_length=100,
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="workshop",
+            name="pretalx_event",
+            field=models.CharField(
+                blank=True,
+                # Existing rows belong to the event synced before events were tracked.
+                default="pycon-cz-23",
+                help_text="slug of the pretalx event, codes are unique within an event",
+                max_length=100,
+            ),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name="speaker",
+            name="pretalx_event",
+            field=models.CharField(
+                blank=True,
+                default=program.models.get_default_pretalx_event,
+                help_text="slug of the pretalx event, codes are unique within an event",
+                max_length=100,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="talk",
+            name="pretalx_event",
+            field=models.CharField(
+                blank=True,
+                default=program.models.get_default_pretalx_event,
+                help_text="slug of the pretalx event, codes are unique within an event",
+                max_length=100,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="workshop",
+            name="pretalx_event",
+            field=models.CharField(
+                blank=True,
+                default=program.models.get_default_pretalx_event,
+                help_text="slug of the pretalx event, codes are unique within an event",
+                max_length=100,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="speaker",
+            name="pretalx_code",
+            field=models.CharField(blank=True, max_length=16, null=True),
+        ),
+        migrations.AlterField(
+            model_name="talk",
+            name="pretalx_code",
+            field=models.CharField(blank=True, max_length=16, null=True),
+        ),
+        migrations.AlterField(
+            model_name="workshop",
+            name="pretalx_code",
+            field=models.CharField(blank=True, max_length=16, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name="speaker",
+            constraint=models.UniqueConstraint(
+                fields=("pretalx_event", "pretalx_code"),
+                name="unique_speaker_pretalx_code",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="talk",
+            constraint=models.UniqueConstraint(
+                fields=("pretalx_event", "pretalx_code"),
+                name="unique_talk_pretalx_code",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="workshop",
+            constraint=models.UniqueConstraint(
+                fields=("pretalx_event", "pretalx_code"),
+                name="unique_workshop_pretalx_code",
+            ),
+        ),
+    ]
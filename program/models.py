@@ -1,12 +1,15 @@
+import abc
 import datetime
 import re
 from pathlib import PurePath
 from typing import Any
 
+from django.conf import settings
 from django.core import validators
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.safestring import mark_safe
 
 from program import pretalx
@@ -16,7 +19,62 @@ YOUTUBE_VIDEO_PATTERN = re.compile(
 )
 
 
-class Speaker(models.Model):
+class PretalxSyncedModel:
+    """
+    Mixin for models synchronized with pretalx. The model must define list of
+    synchronized fields in ``PRETALX_FIELDS`` and implement
+    ``_update_fields_from_pretalx()``.
+    """
+
+    PRETALX_FIELDS: list[str] = []
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        # Django models cannot use ABCMeta, abstract methods are checked here, so
+        # a missing implementation fails on import instead of during a sync.
+        if getattr(cls._update_fields_from_pretalx, "__isabstractmethod__", False):
+            raise TypeError(
+                f"{cls.__name__} must implement _update_fields_from_pretalx()."
+            )
+
+    def update_from_pretalx(
+        self,
+        pretalx_data: dict[str, Any],
+        answers: pretalx.AnswersCollection | None = None,
+    ) -> set[str]:
+        """
+        Updates fields of the model from pretalx data, does not save the model.
+        Returns names of fields whose values have changed.
+
+        Answers from ``pretalx_data`` can be passed already decoded,
+        see ``pretalx.AnswersDecoder``.
+        """
+        if answers is None:
+            answers = pretalx.AnswersCollection(pretalx_data["answers"])
+
+        original_values = self.get_pretalx_values()
+        self._update_fields_from_pretalx(pretalx_data, answers)
+        return {
+            field
+            for field, value in self.get_pretalx_values().items()
+            if value != original_values[field]
+        }
+
+    def get_pretalx_values(self) -> dict[str, Any]:
+        return {field: getattr(self, field) for field in self.PRETALX_FIELDS}
+
+    @abc.abstractmethod
+    def _update_fields_from_pretalx(
+        self, pretalx_data: dict[str, Any], answers: pretalx.AnswersCollection
+    ) -> None:
+        ...
+
+
+def get_default_pretalx_event() -> str:
+    return settings.PRETALX_EVENT_SLUG
+
+
+class Speaker(PretalxSyncedModel, models.Model):
     PRETALX_FIELDS = [
         "full_name",
         "bio",
@@ -30,6 +88,12 @@ class Speaker(models.Model):
 
     class Meta:
         ordering = ("order",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=["pretalx_event", "pretalx_code"],
+                name="unique_speaker_pretalx_code",
+            ),
+        ]
 
     full_name = models.CharField(max_length=200)
     bio = models.TextField()
@@ -40,6 +104,10 @@ class Speaker(models.Model):
     personal_website = models.URLField(max_length=255, blank=True)
     email = models.EmailField()
     photo = models.ImageField(null=True, blank=True, upload_to="speakers/")
+    pretalx_avatar_url = models.URLField(max_length=500, blank=True, editable=False)
+    """URL of the pretalx avatar the photo was downloaded from."""
+    pretalx_avatar_hash = models.CharField(max_length=64, blank=True, editable=False)
+    """SHA-256 hash of the photo downloaded from pretalx."""
     talks = models.ManyToManyField("Talk", blank=True, related_name="talk_speakers")
     workshops = models.ManyToManyField(
         "Workshop", blank=True, related_name="workshop_speakers"
@@ -53,17 +121,24 @@ class Speaker(models.Model):
         max_length=16,
         null=True,
         blank=True,
-        unique=True,
     )
     """
     Code of the speaker in pretalx. Will be used for synchronization.
     When not set, this speaker will not be synchronized with pretalx.
     """
+    pretalx_event = models.CharField(
+        max_length=100,
+        blank=True,
+        default=get_default_pretalx_event,
+        help_text="slug of the pretalx event, codes are unique within an event",
+    )
 
     def __str__(self) -> str:
         return self.full_name
 
-    def update_from_pretalx(self, pretalx_speaker: dict[str, Any]) -> None:
+    def _update_fields_from_pretalx(
+        self, pretalx_speaker: dict[str, Any], answers: pretalx.AnswersCollection
+    ) -> None:
         # Note: remember to update the PRETALX_FIELDS class variable
         # when adding/removing fields synced with pretalx.
         self.full_name = pretalx_speaker["name"]
@@ -74,14 +149,13 @@ class Speaker(models.Model):
         )
         self.email = pretalx_speaker["email"]
 
-        answers = pretalx.AnswersCollection(pretalx_speaker["answers"])
         self.personal_website = answers.get_answer("Your personal website")
         self.github = answers.get_answer("Your GitHub")
         self.twitter = answers.get_answer("Your Twitter")
         self.linkedin = answers.get_answer("Your LinkedIn")
 
 
-class Session(models.Model):
+class Session(PretalxSyncedModel, models.Model):
     """Base class with common fields for 'Workshop' and 'Talk'."""
 
     PRETALX_FIELDS = [
@@ -103,6 +177,12 @@ class Session(models.Model):
             models.Index(fields=["is_backup"]),
             models.Index(fields=["type"]),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["pretalx_event", "pretalx_code"],
+                name="unique_%(class)s_pretalx_code",
+            ),
+        ]
         ordering = ("order",)
 
     TYPE = (
@@ -196,12 +276,18 @@ class Session(models.Model):
         help_text="og:image (social media image) 1200×630 pixels",
         upload_to="og-images/program/",
     )
-    pretalx_code = models.CharField(max_length=16, null=True, blank=True, unique=True)
+    pretalx_code = models.CharField(max_length=16, null=True, blank=True)
     """
     Code of the submission in pretalx. Will be used for synchronization.
     When not set, this submission (workshop or talk) will not be synchronized
     with pretalx.
     """
+    pretalx_event = models.CharField(
+        max_length=100,
+        blank=True,
+        default=get_default_pretalx_event,
+        help_text="slug of the pretalx event, codes are unique within an event",
+    )
 
     @classmethod
     def get_pretalx_submission_type(cls, submission_type: dict[str, str]) -> str:
@@ -219,7 +305,9 @@ class Session(models.Model):
     def __str__(self) -> str:
         return self.title
 
-    def update_from_pretalx(self, pretalx_submission: dict[str, Any]) -> None:
+    def _update_fields_from_pretalx(
+        self, pretalx_submission: dict[str, Any], answers: pretalx.AnswersCollection
+    ) -> None:
         # Note: remember to update the PRETALX_FIELDS class variable
         # when adding/removing fields synced with pretalx.
         self.title = pretalx_submission["title"]
@@ -227,7 +315,6 @@ class Session(models.Model):
         self.private_note = pretalx_submission["internal_notes"]
         self.track = pretalx_submission["track"]["en"].casefold()
 
-        answers = pretalx.AnswersCollection(pretalx_submission["answers"])
         self.language = answers.get_mapped_answer(
             question_text="Language of your session",
             value_map=self.PRETALX_LANGUAGE_MAP,
@@ -329,10 +416,12 @@ class Talk(Session):
             ext = ext[1:]
         return ext
 
-    def update_from_pretalx(self, pretalx_submission: dict[str, Any]) -> None:
+    def _update_fields_from_pretalx(
+        self, pretalx_submission: dict[str, Any], answers: pretalx.AnswersCollection
+    ) -> None:
         # Note: remember to update the PRETALX_FIELDS class variable
         # when adding/removing fields synced with pretalx.
-        super().update_from_pretalx(pretalx_submission)
+        super()._update_fields_from_pretalx(pretalx_submission, answers)
         self.is_keynote = (
             pretalx_submission["submission_type"]["en"].casefold() == "keynote"
         )
@@ -388,12 +477,12 @@ class Workshop(Session):
             return self.public_speakers
         return self.workshop_speakers.all().filter(is_public=True)
 
-    def update_from_pretalx(self, pretalx_submission: dict[str, Any]) -> None:
+    def _update_fields_from_pretalx(
+        self, pretalx_submission: dict[str, Any], answers: pretalx.AnswersCollection
+    ) -> None:
         # Note: remember to update the PRETALX_FIELDS class variable
         # when adding/removing fields synced with pretalx.
-        super().update_from_pretalx(pretalx_submission)
-
-        answers = pretalx.AnswersCollection(pretalx_submission["answers"])
+        super()._update_fields_from_pretalx(pretalx_submission, answers)
         self.requirements = answers.get_answer("Prerequisties and Requirements")
 
         if not self.length:
@@ -515,3 +604,72 @@ class Slot(models.Model):
             "start",
             "room",
         )
+
+
+class PretalxSyncState(models.Model):
+    """
+    State of synchronization with a pretalx event, used for incremental syncs.
+    """
+
+    event_slug = models.CharField(max_length=100, unique=True)
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+    """Start time of the last successfully finished synchronization."""
+    submission_hashes = models.JSONField(default=dict, blank=True)
+    """Content hashes of the last synchronized submissions by pretalx code."""
+    speaker_hashes = models.JSONField(default=dict, blank=True)
+    """Content hashes of the last synchronized speakers by pretalx code."""
+
+    def __str__(self) -> str:
+        return self.event_slug
+
+    class Meta:
+        verbose_name = "pretalx sync state"
+
+
+class SyncJob(models.Model):
+    """
+    Background job synchronizing data from pretalx. Jobs are created by admin
+    actions and the pretalx webhook and performed by the ``program_run_jobs``
+    management command.
+    """
+
+    KIND = (
+        ("update_speakers", "Update speakers"),
+        ("update_talks", "Update talks"),
+        ("update_workshops", "Update workshops"),
+        ("sync_submissions", "Sync changed submissions"),
+        ("sync_speakers", "Sync changed speakers"),
+    )
+
+    STATUS = (
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    )
+
+    kind = models.CharField(max_length=32, choices=KIND)
+    object_ids = models.JSONField(default=list, blank=True)
+    """IDs of objects (speakers, talks or workshops) to synchronize."""
+    pretalx_codes = models.JSONField(default=list, blank=True)
+    """pretalx codes of changed submissions or speakers to synchronize."""
+    pretalx_event = models.CharField(max_length=100, blank=True, default="")
+    """Slug of the pretalx event of ``pretalx_codes``."""
+    status = models.CharField(max_length=10, choices=STATUS, default="pending")
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    """The job is not started before this time, used for debouncing webhooks."""
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()} #{self.id}"
+
+    class Meta:
+        ordering = ("-created_at", "-id")
+        indexes = [
+            models.Index(fields=["status", "run_after"]),
+        ]
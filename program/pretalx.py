@@ -1,41 +1,351 @@
+import base64
+import collections
+import copy
+import dataclasses
+import email.utils
+import functools
+import hashlib
+import json
+import logging
+import math
+import os
+import pathlib
+import tempfile
+import threading
+import time
 import urllib.parse
+from concurrent.futures import Future, ThreadPoolExecutor
 from enum import Enum
-from typing import Any, Iterable
+from typing import Any, Callable, Collection, Iterable, Iterator
 
 import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
 from requests.auth import AuthBase
+from urllib3.util.retry import Retry
+
+from program.sync_metrics import SyncMetrics
+
+logger = logging.getLogger(__name__)
 
 DEFAULT_API_BASE_URL = "https://pretalx.com/api/"
 DEFAULT_LIMIT = 50
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_TIMEOUT = 60
+DEFAULT_MAX_WORKERS = 4
+
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+"""HTTP status codes of responses that will be retried by the client."""
+
+RETRY_METHODS = frozenset({"GET", "HEAD"})
+"""HTTP methods of requests that will be retried by the client."""
+
+RATE_LIMIT_RECOVERY = 0.05
+"""Part of the maximum rate restored by each successful request after HTTP 429."""
 
 
-def create_pretalx_client() -> "PretalxClient":
+def create_pretalx_client(event_slug: str | None = None) -> "PretalxClient":
+    cache = None
+    if settings.PRETALX_CACHE_DIR:
+        cache = ResponseCache(
+            directory=settings.PRETALX_CACHE_DIR,
+            offline=settings.PRETALX_OFFLINE,
+        )
+
+    rate_limiter = None
+    if settings.PRETALX_RATE_LIMIT > 0:
+        rate_limiter = RateLimiter(
+            rate=settings.PRETALX_RATE_LIMIT,
+            burst=settings.PRETALX_RATE_BURST,
+        )
+
     return PretalxClient(
-        event_slug=settings.PRETALX_EVENT_SLUG,
+        event_slug=event_slug or settings.PRETALX_EVENT_SLUG,
         token=settings.PRETALX_TOKEN,
+        pool_size=settings.PRETALX_POOL_SIZE,
+        cache=cache,
+        rate_limiter=rate_limiter,
     )
 
 
+def format_query_params(
+    questions: list[str | int] | None = None,
+    states: list["SubmissionState"] | None = None,
+) -> dict[str, Any]:
+    params = {}
+    if states:
+        params["state"] = [state.value for state in states]
+    if questions:
+        params["questions"] = ",".join(str(question) for question in questions)
+    return params
+
+
+def hash_payload(data: dict[str, Any]) -> str:
+    """
+    Computes a content hash of the data received from pretalx. The hash does not
+    depend on the order of keys.
+    """
+    encoded = json.dumps(data, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def compact_submission(submission: dict[str, Any]) -> dict[str, Any]:
+    """
+    Returns a copy of submission data with only the fields used by the models.
+    """
+    return {
+        "code": submission["code"],
+        "title": submission["title"],
+        "description": submission["description"],
+        "internal_notes": submission["internal_notes"],
+        "track": submission["track"],
+        "submission_type": submission["submission_type"],
+        "duration": submission["duration"],
+        "speakers": [{"code": speaker["code"]} for speaker in submission["speakers"]],
+        "answers": _compact_answers(submission["answers"]),
+    }
+
+
+def compact_speaker(speaker: dict[str, Any]) -> dict[str, Any]:
+    """
+    Returns a copy of speaker data with only the fields used by the models.
+    """
+    return {
+        "code": speaker["code"],
+        "name": speaker["name"],
+        "biography": speaker["biography"],
+        "email": speaker["email"],
+        "avatar": speaker.get("avatar"),
+        "answers": _compact_answers(speaker["answers"]),
+    }
+
+
+def _compact_answers(answers: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return [
+        {
+            "question": {
+                "id": answer["question"]["id"],
+                "question": {"en": answer["question"]["question"]["en"]},
+            },
+            "answer": answer["answer"],
+        }
+        for answer in answers
+    ]
+
+
 class AnswersCollection:
-    def __init__(self, answers: list[dict[str, Any]]) -> None:
-        self.answers = self._preprocess_answers(answers)
+    def __init__(
+        self,
+        answers: list[dict[str, Any]],
+        question_keys: dict[int, str] | None = None,
+    ) -> None:
+        self.answers = self._preprocess_answers(answers, question_keys)
 
     def get_answer(self, question_text: str) -> str:
-        return self.answers.get(question_text.casefold(), "")
+        return self.answers.get(_casefold(question_text), "")
 
     def get_mapped_answer(self, question_text: str, value_map: dict[str, str]) -> str:
         value = self.get_answer(question_text)
-        return value_map.get(value.casefold(), "")
+        return value_map.get(_casefold(value), "")
+
+    def _preprocess_answers(
+        self,
+        answers: list[dict[str, Any]],
+        question_keys: dict[int, str] | None,
+    ) -> dict[str, str]:
+        if question_keys is None:
+            question_keys = {}
 
-    def _preprocess_answers(self, answers: list[dict[str, Any]]) -> dict[str, str]:
         result = {}
         for answer in answers:
-            question_text: str = answer["question"]["question"]["en"]
-            result[question_text.casefold()] = answer["answer"]
+            question = answer["question"]
+            key = question_keys.get(question["id"])
+            if key is None:
+                question_text: str = question["question"]["en"]
+                key = question_keys[question["id"]] = question_text.casefold()
+            result[key] = answer["answer"]
         return result
 
 
+class AnswersDecoder:
+    """
+    Decodes answers for many submissions or speakers. Keys of questions are
+    resolved only once per question ID and shared by all decoded collections.
+    """
+
+    def __init__(self) -> None:
+        self._question_keys: dict[int, str] = {}
+
+    def decode(self, answers: list[dict[str, Any]]) -> AnswersCollection:
+        return AnswersCollection(answers, question_keys=self._question_keys)
+
+
+@functools.lru_cache(maxsize=1024)
+def _casefold(value: str) -> str:
+    # Question texts and answers to choice questions repeat a lot,
+    # cache their case-folded variants.
+    return value.casefold()
+
+
+class ResponseNotCachedError(LookupError):
+    """Raised in the offline mode when there is no cached response for a URL."""
+
+
+@dataclasses.dataclass()
+class CachedResponse:
+    data: Any
+    etag: str | None = None
+    last_modified: str | None = None
+
+    def get_conditional_headers(self) -> dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    On-disk cache of responses from the pretalx API, keyed by the full URL
+    (including query parameters). Each response is stored as a JSON file.
+
+    The client uses ``ETag`` and ``Last-Modified`` headers of the cached responses
+    to send conditional requests, so unchanged data are not downloaded again.
+    In the ``offline`` mode, no requests are sent at all and responses are replayed
+    from the cache, e.g. for development or tests.
+    """
+
+    def __init__(self, directory: str | os.PathLike, offline: bool = False) -> None:
+        self.directory = pathlib.Path(directory)
+        self.offline = offline
+
+    def get(self, url: str) -> CachedResponse | None:
+        try:
+            with open(self._get_path(url), encoding="utf-8") as cache_file:
+                entry = json.load(cache_file)
+        except FileNotFoundError:
+            return None
+        return CachedResponse(
+            data=entry["data"],
+            etag=entry["etag"],
+            last_modified=entry["last_modified"],
+        )
+
+    def set(self, url: str, response: CachedResponse) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "url": url,
+            "etag": response.etag,
+            "last_modified": response.last_modified,
+            "data": response.data,
+        }
+        # Write to a temporary file first, so readers (other threads or processes)
+        # never see a partially written file.
+        with tempfile.NamedTemporaryFile(
+            mode="w",
+            encoding="utf-8",
+            dir=self.directory,
+            suffix=".tmp",
+            delete=False,
+        ) as temp_file:
+            json.dump(entry, temp_file)
+        os.replace(temp_file.name, self._get_path(url))
+
+    def _get_path(self, url: str) -> pathlib.Path:
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return self.directory / f"{key}.json"
+
+
+class RateLimiter:
+    """
+    Token bucket limiting the rate of requests to the pretalx API. Up to ``burst``
+    requests can be sent at once, then ``rate`` requests per second.
+
+    The rate adapts to HTTP 429 responses: it is halved (down to ``min_rate``)
+    and no request is sent until the ``Retry-After`` delay passes. Successful
+    requests then restore the rate gradually, see ``RATE_LIMIT_RECOVERY``.
+
+    The limiter is thread-safe, one instance is shared by all requests of
+    a client, including its worker threads and clients created by ``for_event()``.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        min_rate: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if rate <= 0 or burst < 1:
+            raise ValueError("Rate must be positive and burst at least 1.")
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated_at = clock()
+
+    def acquire(self) -> float:
+        """Waits until a request can be sent. Returns the waiting time in seconds."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                # The limiter may be paused after HTTP 429.
+                delay = (1 - self._tokens) / self.rate + max(self._updated_at - now, 0)
+            self._sleep(delay)
+            waited += delay
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.rate = min(
+                self.rate + self.max_rate * RATE_LIMIT_RECOVERY, self.max_rate
+            )
+
+    def on_rate_limited(self, retry_after: float | None = None) -> None:
+        """Slows down after HTTP 429, optionally pausing for ``retry_after`` seconds."""
+        with self._lock:
+            self.rate = max(self.rate / 2, self.min_rate)
+            self._tokens = 0.0
+            # Tokens are not refilled until the pause ends.
+            self._updated_at = max(self._updated_at, self._clock() + (retry_after or 0))
+
+    def _refill(self, now: float) -> None:
+        if now <= self._updated_at:
+            return
+        self._tokens = min(
+            self._tokens + (now - self._updated_at) * self.rate, self.burst
+        )
+        self._updated_at = now
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parses the ``Retry-After`` header, either seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - time.time(), 0.0)
+
+
 class SubmissionState(Enum):
     SUBMITTED = "submitted"
     ACCEPTED = "accepted"
@@ -55,133 +365,489 @@ class PretalxTokenAuth(AuthBase):
 
 
 class PretalxClient:
+    """
+    Client for the pretalx REST API.
+
+    The client keeps a pool of persistent (keep-alive) connections, so the TCP
+    and TLS handshakes are not repeated for every request. Requests failing with
+    HTTP 429 or 5xx are retried with an exponential backoff, ``Retry-After``
+    header sent by the server is honored.
+
+    With a ``rate_limiter``, all requests (pages, single objects and files) share
+    its budget, including retries: responses with HTTP 429 and 5xx are then
+    retried by the client itself, after the limiter slows down (429) or after
+    the backoff (5xx). Connection errors are still retried by the connection pool.
+
+    Call ``close()`` or use the client as a context manager to release the
+    connections when the client is no longer needed. Clients for other events
+    created by ``for_event()`` share the connections.
+    """
+
     def __init__(
         self,
         event_slug: str,
         token: str,
         api_base_url: str = DEFAULT_API_BASE_URL,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        cache: ResponseCache | None = None,
+        metrics: SyncMetrics | None = None,
+        rate_limiter: RateLimiter | None = None,
     ):
         self.event_slug = event_slug
         self._auth = PretalxTokenAuth(token)
         self.api_base_url = api_base_url.rstrip(
             "/"
         )  # ensure there is no trailing slash
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.cache = cache
+        self.metrics = metrics if metrics is not None else SyncMetrics()
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.rate_limiter = rate_limiter
+        self._session = self._create_session(
+            pool_size=pool_size,
+            max_retries=max_retries,
+            backoff_factor=backoff_factor,
+        )
+        self._owns_session = True
+
+    def __enter__(self) -> "PretalxClient":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Closes all pooled connections. The client must not be used afterwards.
+        Clients created by ``for_event()`` do not own the connections, they are
+        closed by the original client.
+        """
+        if self._owns_session:
+            self._session.close()
+
+    def for_event(self, event_slug: str) -> "PretalxClient":
+        """
+        Returns a client for another event, sharing the connection pool, response
+        cache and rate limiter of this client. It has its own ``metrics``.
+        """
+        client = copy.copy(self)
+        client.event_slug = event_slug
+        client.metrics = SyncMetrics()
+        client._owns_session = False
+        return client
 
     def list_submissions(
         self,
         questions: list[str | int] | None = None,
         states: list[SubmissionState] | None = None,
         limit: int = DEFAULT_LIMIT,
+        parallel: bool = False,
     ) -> Iterable[dict[str, Any]]:
-        params = {}
-        if states:
-            params["state"] = [state.value for state in states]
-        if questions:
-            params["questions"] = ",".join(str(question) for question in questions)
-
         return self._paginate_results(
             endpoint="submissions/",
-            query_params=params,
+            query_params=format_query_params(questions=questions, states=states),
             limit=limit,
+            parallel=parallel,
         )
 
     def get_submission(
         self, code: str, questions: list[str | int] | None = None
     ) -> dict[str, Any]:
-        params = {}
-        if questions:
-            params["questions"] = ",".join(str(question) for question in questions)
-
         return self._call_endpoint(
             method="GET",
             endpoint=f"submissions/{urllib.parse.quote(code)}",
-            query_params=params,
+            query_params=format_query_params(questions=questions),
+        )
+
+    def get_submissions(
+        self,
+        codes: Collection[str],
+        questions: list[str | int] | None = None,
+        skip_missing: bool = False,
+    ) -> dict[str, dict[str, Any]]:
+        """
+        Fetches multiple submissions, returns a dictionary with submission data
+        by code. See ``_get_many()`` for details.
+        """
+        return self._get_many(
+            codes=codes,
+            endpoint="submissions/",
+            query_params=format_query_params(questions=questions),
+            get_func=lambda code: self.get_submission(code=code, questions=questions),
+            skip_missing=skip_missing,
         )
 
     def list_speakers(
         self,
         questions: list[str | int] | None = None,
         limit: int = DEFAULT_LIMIT,
-    ):
-        params = {}
-        if questions:
-            params["questions"] = ",".join(str(question) for question in questions)
-
+        parallel: bool = False,
+    ) -> Iterable[dict[str, Any]]:
         return self._paginate_results(
             endpoint="speakers/",
-            query_params=params,
+            query_params=format_query_params(questions=questions),
             limit=limit,
+            parallel=parallel,
         )
 
     def get_speaker(
         self, code: str, questions: list[str | int] | None = None
     ) -> dict[str, Any]:
-        params = {}
-        if questions:
-            params["questions"] = ",".join(str(question) for question in questions)
-
         return self._call_endpoint(
             method="GET",
             endpoint=f"speakers/{urllib.parse.quote(code)}",
-            query_params=params,
+            query_params=format_query_params(questions=questions),
+        )
+
+    def get_speakers(
+        self,
+        codes: Collection[str],
+        questions: list[str | int] | None = None,
+        skip_missing: bool = False,
+    ) -> dict[str, dict[str, Any]]:
+        """
+        Fetches multiple speakers, returns a dictionary with speaker data by code.
+        See ``_get_many()`` for details.
+        """
+        return self._get_many(
+            codes=codes,
+            endpoint="speakers/",
+            query_params=format_query_params(questions=questions),
+            get_func=lambda code: self.get_speaker(code=code, questions=questions),
+            skip_missing=skip_missing,
         )
 
+    def get_file(self, url: str) -> bytes:
+        """
+        Downloads a file linked from the API data, e.g. an avatar. Files are cached
+        (and replayed in the offline mode) like responses of the API.
+        """
+        encoded = self._get_cached(
+            url,
+            None,
+            load=lambda response: base64.b64encode(response.content).decode("ascii"),
+        )
+        return base64.b64decode(encoded)
+
+    def get_json(
+        self, url: str, query_params: dict[str, Any] | None = None
+    ) -> dict[str, Any]:
+        """
+        Sends a single (blocking) GET request to the API through the connection
+        pool, retries, rate limiter and response cache of the client.
+        """
+        return self._get_cached(
+            url, query_params, load=lambda response: response.json()
+        )
+
+    def format_endpoint_url(self, endpoint: str) -> str:
+        """Returns the URL of the endpoint of the client's event."""
+        return (
+            f"{self.api_base_url}/events/"
+            f"{urllib.parse.quote(self.event_slug)}/{endpoint}"
+        )
+
+    def _get_many(
+        self,
+        codes: Collection[str],
+        endpoint: str,
+        query_params: dict[str, Any],
+        get_func: Callable[[str], dict[str, Any]],
+        skip_missing: bool = False,
+    ) -> dict[str, dict[str, Any]]:
+        """
+        Fetches multiple objects by their codes.
+
+        pretalx API cannot filter lists by code. The first page of the list tells
+        the total number of objects, when listing the whole endpoint takes fewer
+        requests than fetching the objects one by one, the requested objects are
+        picked from the list. Other objects (and objects missing in the list) are
+        fetched individually by a pool of ``max_workers`` threads.
+
+        When ``skip_missing`` is set, objects not found (e.g. deleted in pretalx)
+        are left out of the result instead of raising ``HTTPError``.
+        """
+        codes = set(codes)
+        result: dict[str, dict[str, Any]] = {}
+
+        if len(codes) > 1:
+            first_page = self.get_json(
+                self.format_endpoint_url(endpoint),
+                dict(query_params, limit=DEFAULT_LIMIT, offset=0),
+            )
+            if math.ceil(first_page["count"] / DEFAULT_LIMIT) < len(codes):
+                results = self._paginate_results_parallel(
+                    endpoint, query_params, DEFAULT_LIMIT, first_page=first_page
+                )
+            else:
+                results = first_page["results"]
+            for data in results:
+                if data["code"] in codes:
+                    result[data["code"]] = data
+
+        def get_or_skip(code: str) -> dict[str, Any] | None:
+            try:
+                return get_func(code)
+            except requests.HTTPError as exc:
+                if not skip_missing or exc.response.status_code != 404:
+                    raise
+                logger.warning("Skipping %s%s, it was not found.", endpoint, code)
+                return None
+
+        missing_codes = [code for code in codes if code not in result]
+        if missing_codes:
+            with ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="pretalx-get",
+            ) as executor:
+                for code, data in zip(
+                    missing_codes, executor.map(get_or_skip, missing_codes)
+                ):
+                    if data is not None:
+                        result[code] = data
+
+        return result
+
     def _paginate_results(
         self,
         endpoint: str,
         query_params: dict[str, Any] | None = None,
         limit: int = DEFAULT_LIMIT,
+        parallel: bool = False,
     ) -> Iterable[dict[str, Any]]:
-        next_page_url = self._format_endpoint_url(endpoint)
+        """
+        Iterates over results of a paginated endpoint.
+
+        When ``parallel`` is set, the first page is downloaded to find out the total
+        number of results and the remaining pages are prefetched concurrently
+        by a pool of ``max_workers`` threads. Results are always yielded in
+        the page order.
+        """
+        if parallel:
+            return self._paginate_results_parallel(endpoint, query_params, limit)
+        return self._paginate_results_sequential(endpoint, query_params, limit)
+
+    def _paginate_results_sequential(
+        self,
+        endpoint: str,
+        query_params: dict[str, Any] | None,
+        limit: int,
+    ) -> Iterator[dict[str, Any]]:
+        next_page_url = self.format_endpoint_url(endpoint)
         next_query_params = query_params if query_params is not None else {}
         next_query_params["limit"] = limit
 
         while next_page_url is not None:
-            with self._do_request(
-                method="GET",
-                url=next_page_url,
-                query_params=next_query_params,
-            ) as response:
-                response.raise_for_status()
+            response_data = self.get_json(next_page_url, next_query_params)
+            yield from response_data["results"]
+
+            next_page_url = response_data["next"]
+            # The URL of the next page already includes query parameters,
+            # do not send them.
+            next_query_params = None
+
+    def _paginate_results_parallel(
+        self,
+        endpoint: str,
+        query_params: dict[str, Any] | None,
+        limit: int,
+        first_page: dict[str, Any] | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        url = self.format_endpoint_url(endpoint)
+        page_params = dict(query_params or {}, limit=limit)
+
+        response_data = first_page
+        if response_data is None:
+            response_data = self.get_json(url, dict(page_params, offset=0))
+        yield from response_data["results"]
+        if response_data["next"] is None:
+            return
+
+        offsets = iter(range(limit, response_data["count"], limit))
+        # Keep only a bounded number of pages in flight: a new page is requested
+        # only after the oldest one is consumed.
+        pending: collections.deque[Future] = collections.deque()
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="pretalx-page",
+        )
 
-                response_data = response.json()
+        def request_next_page() -> None:
+            offset = next(offsets, None)
+            if offset is not None:
+                pending.append(
+                    executor.submit(
+                        self.get_json, url, dict(page_params, offset=offset)
+                    )
+                )
+
+        try:
+            for _ in range(self.max_workers):
+                request_next_page()
+
+            while pending:
+                response_data = pending.popleft().result()
+                request_next_page()
                 yield from response_data["results"]
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
 
-                next_page_url = response_data["next"]
-                # The URL of the next page already includes query parameters,
-                # do not send them.
-                next_query_params = None
+        # New results might have been added since the first page was downloaded,
+        # continue to follow the links until the real end.
+        next_page_url = response_data["next"]
+        while next_page_url is not None:
+            response_data = self.get_json(next_page_url)
+            yield from response_data["results"]
+            next_page_url = response_data["next"]
 
     def _call_endpoint(
         self, method: str, endpoint: str, query_params: dict[str, Any] | None = None
     ):
+        url = self.format_endpoint_url(endpoint)
+        if method == "GET":
+            return self.get_json(url, query_params)
+
         with self._do_request(
             method=method,
-            url=self._format_endpoint_url(endpoint),
+            url=url,
             query_params=query_params,
         ) as response:
             response.raise_for_status()
             return response.json()
 
-    def _format_endpoint_url(self, endpoint: str) -> str:
-        return (
-            f"{self.api_base_url}/events/"
-            f"{urllib.parse.quote(self.event_slug)}/{endpoint}"
+    def _get_cached(
+        self,
+        url: str,
+        query_params: dict[str, Any] | None,
+        load: Callable[[requests.Response], Any],
+    ) -> Any:
+        """
+        Sends a GET request through the response cache (when configured).
+        ``load`` converts the response to JSON-compatible data stored in the cache.
+        """
+        if self.cache is None:
+            with self._do_request(
+                method="GET",
+                url=url,
+                query_params=query_params,
+            ) as response:
+                response.raise_for_status()
+                return load(response)
+
+        full_url = requests.Request("GET", url, params=query_params).prepare().url
+        cached = self.cache.get(full_url)
+        if self.cache.offline:
+            if cached is None:
+                raise ResponseNotCachedError(f"No cached response for {full_url}")
+            return cached.data
+
+        with self._do_request(
+            method="GET",
+            url=full_url,
+            headers=cached.get_conditional_headers() if cached else None,
+        ) as response:
+            if cached is not None and response.status_code == 304:
+                return cached.data
+
+            response.raise_for_status()
+            data = load(response)
+            self.cache.set(
+                full_url,
+                CachedResponse(
+                    data=data,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                ),
+            )
+            return data
+
+    def _create_session(
+        self, pool_size: int, max_retries: int, backoff_factor: float
+    ) -> requests.Session:
+        status_forcelist = RETRY_STATUS_CODES
+        if self.rate_limiter is not None:
+            # Responses are retried in `_do_request()` to go through the limiter.
+            status_forcelist = frozenset()
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=status_forcelist,
+            allowed_methods=RETRY_METHODS,
+            respect_retry_after_header=True,
+            # Let `raise_for_status()` report the last failed response.
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=retry,
         )
 
+        session = requests.Session()
+        session.auth = self._auth
+        session.headers["Accept"] = "application/json"
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
     def _do_request(
         self,
         method: str,
         url: str,
         query_params: dict[str, Any] | None = None,
-    ):
-        return requests.request(
-            method=method,
-            url=url,
-            params=query_params,
-            headers={
-                "Accept": "application/json",
-            },
-            auth=self._auth,
-            timeout=60,
-        )
+        headers: dict[str, str] | None = None,
+    ) -> requests.Response:
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter is not None:
+                self.metrics.record_rate_limit_wait(self.rate_limiter.acquire())
+
+            started_at = time.perf_counter()
+            response = self._session.request(
+                method=method,
+                url=url,
+                params=query_params,
+                headers=headers,
+                timeout=self.timeout,
+            )
+            self.metrics.record_request(
+                endpoint=self._get_metrics_endpoint(url),
+                status_code=response.status_code,
+                bytes_received=len(response.content),
+                latency=time.perf_counter() - started_at,
+            )
+            if self.rate_limiter is None:
+                return response
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if response.status_code == 429:
+                self.rate_limiter.on_rate_limited(retry_after)
+            elif response.status_code in RETRY_STATUS_CODES and method in RETRY_METHODS:
+                if attempt < self.max_retries:
+                    if retry_after is None:
+                        retry_after = self.backoff_factor * 2**attempt
+                    time.sleep(retry_after)
+            else:
+                self.rate_limiter.on_success()
+                return response
+
+            if attempt < self.max_retries:
+                response.close()
+        return response
+
+    def _get_metrics_endpoint(self, url: str) -> str:
+        """
+        Returns the endpoint of the URL for metrics, object codes are replaced,
+        e.g. ``submissions/{code}``.
+        """
+        event_path = urllib.parse.urlsplit(self.format_endpoint_url("")).path
+        path = urllib.parse.urlsplit(url).path
+        if not path.startswith(event_path):
+            # Files (e.g. avatars) are not served by the API.
+            return "files"
+        resource, _, code = path.removeprefix(event_path).strip("/").partition("/")
+        return f"{resource}/{{code}}" if code else f"{resource}/"
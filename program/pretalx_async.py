@@ -0,0 +1,151 @@
+import asyncio
+import collections
+import urllib.parse
+from typing import Any, AsyncIterator, Collection
+
+from program import pretalx
+
+
+class AsyncPretalxClient:
+    """
+    asyncio variant of ``PretalxClient`` with the same methods, paginated results
+    are returned as async generators.
+
+    Requests are sent by the blocking ``PretalxClient.get_json()`` of the wrapped
+    client in worker threads (``asyncio.to_thread()``), so its connection pool,
+    retries, response cache and rate limiter are shared. At most
+    ``max_concurrency`` requests (and threads) are in progress at once. No async
+    HTTP library is required for that, the event loop only schedules requests.
+    """
+
+    def __init__(
+        self,
+        client: pretalx.PretalxClient,
+        max_concurrency: int = pretalx.DEFAULT_MAX_WORKERS,
+    ) -> None:
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def list_submissions(
+        self,
+        questions: list[str | int] | None = None,
+        states: list[pretalx.SubmissionState] | None = None,
+        limit: int = pretalx.DEFAULT_LIMIT,
+    ) -> AsyncIterator[dict[str, Any]]:
+        async for submission in self._paginate_results(
+            endpoint="submissions/",
+            query_params=pretalx.format_query_params(
+                questions=questions, states=states
+            ),
+            limit=limit,
+        ):
+            yield submission
+
+    async def get_submission(
+        self, code: str, questions: list[str | int] | None = None
+    ) -> dict[str, Any]:
+        return await self._get_json(
+            self.client.format_endpoint_url(f"submissions/{urllib.parse.quote(code)}"),
+            pretalx.format_query_params(questions=questions),
+        )
+
+    async def get_submissions(
+        self, codes: Collection[str], questions: list[str | int] | None = None
+    ) -> dict[str, dict[str, Any]]:
+        codes = list(codes)
+        results = await asyncio.gather(
+            *(self.get_submission(code, questions=questions) for code in codes)
+        )
+        return dict(zip(codes, results))
+
+    async def list_speakers(
+        self,
+        questions: list[str | int] | None = None,
+        limit: int = pretalx.DEFAULT_LIMIT,
+    ) -> AsyncIterator[dict[str, Any]]:
+        async for speaker in self._paginate_results(
+            endpoint="speakers/",
+            query_params=pretalx.format_query_params(questions=questions),
+            limit=limit,
+        ):
+            yield speaker
+
+    async def get_speaker(
+        self, code: str, questions: list[str | int] | None = None
+    ) -> dict[str, Any]:
+        return await self._get_json(
+            self.client.format_endpoint_url(f"speakers/{urllib.parse.quote(code)}"),
+            pretalx.format_query_params(questions=questions),
+        )
+
+    async def get_speakers(
+        self, codes: Collection[str], questions: list[str | int] | None = None
+    ) -> dict[str, dict[str, Any]]:
+        codes = list(codes)
+        results = await asyncio.gather(
+            *(self.get_speaker(code, questions=questions) for code in codes)
+        )
+        return dict(zip(codes, results))
+
+    async def _paginate_results(
+        self,
+        endpoint: str,
+        query_params: dict[str, Any],
+        limit: int,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Downloads the first page to find out the total number of results, then
+        prefetches the remaining pages concurrently. Results are yielded in
+        the page order.
+        """
+        url = self.client.format_endpoint_url(endpoint)
+        page_params = dict(query_params, limit=limit)
+
+        response_data = await self._get_json(url, dict(page_params, offset=0))
+        for result in response_data["results"]:
+            yield result
+        if response_data["next"] is None:
+            return
+
+        offsets = iter(range(limit, response_data["count"], limit))
+        # Keep only a bounded number of pages in flight: a new page is requested
+        # only after the oldest one is consumed.
+        pending: collections.deque[asyncio.Task] = collections.deque()
+
+        def request_next_page() -> None:
+            offset = next(offsets, None)
+            if offset is not None:
+                pending.append(
+                    asyncio.create_task(
+                        self._get_json(url, dict(page_params, offset=offset))
+                    )
+                )
+
+        try:
+            for _ in range(self.max_concurrency):
+                request_next_page()
+
+            while pending:
+                response_data = await pending.popleft()
+                request_next_page()
+                for result in response_data["results"]:
+                    yield result
+        finally:
+            for task in pending:
+                task.cancel()
+
+        # New results might have been added since the first page was downloaded,
+        # continue to follow the links until the real end.
+        next_page_url = response_data["next"]
+        while next_page_url is not None:
+            response_data = await self._get_json(next_page_url)
+            for result in response_data["results"]:
+                yield result
+            next_page_url = response_data["next"]
+
+    async def _get_json(
+        self, url: str, query_params: dict[str, Any] | None = None
+    ) -> dict[str, Any]:
+        async with self._semaphore:
+            return await asyncio.to_thread(self.client.get_json, url, query_params)
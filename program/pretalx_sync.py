@@ -1,38 +1,101 @@
-from collections import ChainMap
-from collections.abc import Collection
-from typing import Any, MutableMapping
+import asyncio
+import hashlib
+import itertools
+import logging
+import urllib.parse
+from collections import ChainMap, defaultdict
+from collections.abc import AsyncIterator, Callable, Collection, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import PurePosixPath
+from typing import Any, MutableMapping, TypeVar
 
-from program import models, pretalx
+import requests
+from django.core.files.base import ContentFile
+from django.db import models as django_models
+from django.utils import timezone
+
+from program import (
+    models,
+    pretalx,
+    pretalx_async,
+    schedule_snapshot,
+    sync_plan,
+    sync_scheduler,
+)
+
+SYNC_CHUNK_SIZE = 200
+"""Maximum number of objects written to the database at once by ``full_sync``."""
+
+SPEAKER_PREFETCH_SIZE = 5 * SYNC_CHUNK_SIZE
+"""
+Maximum number of speakers downloaded by ``full_sync`` before they are written.
+"""
+
+SPEAKER_PHOTO_PREFIX = "speakers/pretalx-"
+"""Prefix of names of speaker photos downloaded from pretalx."""
+
+SPEAKER_PHOTO_SUFFIXES = frozenset({".jpg", ".jpeg", ".png", ".gif", ".webp"})
+
+logger = logging.getLogger(__name__)
+
+PretalxModel = TypeVar("PretalxModel", bound=models.PretalxSyncedModel)
 
 
 class PretalxSync:
+    """
+    Synchronizes speakers, talks and workshops of the client's pretalx event.
+    Objects are matched by their ``pretalx_code`` within the ``pretalx_event``,
+    objects passed to the ``update_*()`` methods must belong to the event.
+    """
+
     def __init__(self, pretalx_client: pretalx.PretalxClient) -> None:
         self.client = pretalx_client
+        # Shared with the client, which records HTTP requests.
+        self.metrics = pretalx_client.metrics
         # Used for assigning unique order numbers to new talks/workshops
         self._talks_order = 0
         self._workshops_order = 0
         # Used assigning speakers when updating individual submissions
         self._existing_speakers: dict[str, models.Speaker] | None = None
+        self._answers_decoder = pretalx.AnswersDecoder()
+
+    def __enter__(self) -> "PretalxSync":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Releases connections held by the pretalx client."""
+        self.client.close()
 
     def update_speakers(self, speakers: Collection[models.Speaker]) -> None:
         """
         Fetches updated data for the given list of speakers and updates the database
         models.
 
-        Note: this method currently performs 1 API call per speaker, therefore
-        updating many speakers might take a long time and might cause the HTTP
-        request to time-out.
+        Speakers are fetched in a batch, see ``PretalxClient.get_speakers()``.
         """
+        speakers_data = self.client.get_speakers(
+            codes=[speaker.pretalx_code for speaker in speakers],
+            questions=["all"],
+        )
+        self._update_speakers(speakers, speakers_data)
+
+    def _update_speakers(
+        self,
+        speakers: Collection[models.Speaker],
+        speakers_data: dict[str, dict[str, Any]],
+    ) -> None:
+        changes: list[tuple[models.Speaker, set[str]]] = []
         for speaker in speakers:
-            speaker_data = self.client.get_speaker(
-                code=speaker.pretalx_code,
-                questions=["all"],
-            )
-            speaker.update_from_pretalx(speaker_data)
+            speaker_data = speakers_data[speaker.pretalx_code]
+            changes.append((speaker, self._update_from_pretalx(speaker, speaker_data)))
 
-        models.Speaker.objects.bulk_update(
-            objs=speakers,
-            fields=models.Speaker.PRETALX_FIELDS,
+        self._bulk_update_changed(models.Speaker, changes)
+        self._sync_speaker_photos(
+            (speaker, speakers_data[speaker.pretalx_code].get("avatar"))
+            for speaker in speakers
         )
 
     def update_talks(self, talks: Collection[models.Talk]) -> None:
@@ -40,210 +103,650 @@ class PretalxSync:
         Fetches updated data for the given list of talks and updates the database
         models.
 
-        Note: this method currently performs 1 API call per talk, therefore
-        updating many talks might take a long time and might cause the HTTP
-        request to time-out.
+        Submissions are fetched in a batch, see ``PretalxClient.get_submissions()``.
         """
+        submissions_data = self.client.get_submissions(
+            codes=[talk.pretalx_code for talk in talks],
+            questions=["all"],
+        )
+        speakers = self._get_or_fetch_speakers(
+            speaker_data["code"]
+            for submission_data in submissions_data.values()
+            for speaker_data in submission_data["speakers"]
+        )
+        changes: list[tuple[models.Talk, set[str]]] = []
+        session_speakers: dict[int, list[models.Speaker]] = {}
         for talk in talks:
-            submission_data = self.client.get_submission(
-                code=talk.pretalx_code,
-                questions=["all"],
-            )
-            talk.update_from_pretalx(submission_data)
-            talk.talk_speakers.set(
-                [
-                    self._get_or_fetch_speaker(speaker_data["code"])
-                    for speaker_data in submission_data["speakers"]
-                ]
-            )
+            submission_data = submissions_data[talk.pretalx_code]
+            changes.append((talk, self._update_from_pretalx(talk, submission_data)))
+            session_speakers[talk.id] = [
+                speakers[speaker_data["code"]]
+                for speaker_data in submission_data["speakers"]
+            ]
 
-        models.Talk.objects.bulk_update(
-            objs=talks,
-            fields=models.Talk.PRETALX_FIELDS,
-        )
+        self._bulk_update_changed(models.Talk, changes)
+        self._set_session_speakers(models.Speaker.talks.through, session_speakers)
 
     def update_workshops(self, workshops: Collection[models.Workshop]) -> None:
         """
         Fetches updated data for the given list of workshops and updates the database
         models.
 
-        Note: this method currently performs 1 API call per workshop, therefore
-        updating many workshops might take a long time and might cause the HTTP
-        request to time-out.
+        Submissions are fetched in a batch, see ``PretalxClient.get_submissions()``.
         """
+        submissions_data = self.client.get_submissions(
+            codes=[workshop.pretalx_code for workshop in workshops],
+            questions=["all"],
+        )
+        speakers = self._get_or_fetch_speakers(
+            speaker_data["code"]
+            for submission_data in submissions_data.values()
+            for speaker_data in submission_data["speakers"]
+        )
+        changes: list[tuple[models.Workshop, set[str]]] = []
+        session_speakers: dict[int, list[models.Speaker]] = {}
         for workshop in workshops:
-            submission_data = self.client.get_submission(
-                code=workshop.pretalx_code,
-                questions=["all"],
+            submission_data = submissions_data[workshop.pretalx_code]
+            changes.append(
+                (workshop, self._update_from_pretalx(workshop, submission_data))
             )
-            workshop.update_from_pretalx(submission_data)
-            workshop.workshop_speakers.set(
-                [
-                    self._get_or_fetch_speaker(speaker_data["code"])
-                    for speaker_data in submission_data["speakers"]
+            session_speakers[workshop.id] = [
+                speakers[speaker_data["code"]]
+                for speaker_data in submission_data["speakers"]
+            ]
+
+        self._bulk_update_changed(models.Workshop, changes)
+        self._set_session_speakers(models.Speaker.workshops.through, session_speakers)
+
+    def sync_submissions(self, codes: Collection[str]) -> None:
+        """
+        Synchronizes submissions given by their pretalx codes, e.g. after they
+        were changed in pretalx. Existing talks and workshops are updated, new ones
+        are created for confirmed submissions only (same as in ``full_sync``).
+        Submissions not found in pretalx (e.g. deleted ones) are skipped.
+        """
+        submissions_data = self.client.get_submissions(
+            codes=codes, questions=["all"], skip_missing=True
+        )
+        talks = self._load_existing(models.Talk, codes)
+        workshops = self._load_existing(models.Workshop, codes)
+        self._talks_order = self._get_max_order(models.Talk)
+        self._workshops_order = self._get_max_order(models.Workshop)
+
+        submissions = [
+            pretalx.compact_submission(submission_data)
+            for submission_data in submissions_data.values()
+            if submission_data["code"] in talks
+            or submission_data["code"] in workshops
+            or submission_data["state"] == pretalx.SubmissionState.CONFIRMED.value
+        ]
+        self._sync_submissions(submissions, talks, workshops)
+
+        speakers = self._get_or_fetch_speakers(
+            speaker_data["code"]
+            for submission_data in submissions
+            for speaker_data in submission_data["speakers"]
+        )
+        self._sync_session_speakers(
+            {
+                submission_data["code"]: [
+                    speaker_data["code"] for speaker_data in submission_data["speakers"]
                 ]
-            )
+                for submission_data in submissions
+            },
+            talks,
+            workshops,
+            speakers,
+        )
 
-        models.Workshop.objects.bulk_update(
-            objs=workshops,
-            fields=models.Workshop.PRETALX_FIELDS,
+    def sync_speakers(self, codes: Collection[str]) -> None:
+        """
+        Updates speakers given by their pretalx codes. Speakers not yet in the
+        database are skipped, they are created with their first synced submission.
+        Speakers not found in pretalx are skipped as well.
+        """
+        speakers = self._load_existing(models.Speaker, codes)
+        if not speakers:
+            return
+
+        speakers_data = self.client.get_speakers(
+            codes=speakers.keys(), questions=["all"], skip_missing=True
+        )
+        self._update_speakers(
+            [speakers[code] for code in speakers_data],
+            speakers_data,
         )
 
-    def full_sync(self):
+    def full_sync(
+        self,
+        incremental: bool = False,
+        concurrent_fetch: bool = False,
+        plan: sync_plan.SyncPlan | None = None,
+    ) -> dict[str, sync_scheduler.StageTiming]:
         """
         Performs full synchronization of speakers, talks and workshops. New entries
         are created when required, existing entries will be updated.
 
         This operation currently creates or updates only speakers with at least
         one confirmed submission.
+
+        Data from pretalx are processed as a stream: only fields required by the
+        models are kept (see ``pretalx.compact_submission()``) and the database is
+        written in chunks of ``SYNC_CHUNK_SIZE`` objects.
+
+        The sync is split into stages run by ``SyncScheduler``: speakers are
+        downloaded in the background while submissions are downloaded and written,
+        then speakers are written and finally assigned to the sessions. Speakers
+        are buffered until codes of confirmed speakers are known, at most
+        ``SPEAKER_PREFETCH_SIZE`` of them. Timings of the stages are returned and
+        recorded to ``metrics`` together with numbers of created, updated and
+        unchanged rows.
+
+        pretalx API does not provide modification times, therefore content hashes
+        of all synchronized objects are stored in ``PretalxSyncState`` of the event.
+        When ``incremental`` is set, objects with the same hash as in the last sync
+        are skipped and their database rows are not written at all.
+
+        When ``concurrent_fetch`` is set, both submissions and speakers are
+        downloaded in the background by ``AsyncPretalxClient`` and streamed to the
+        stages writing them.
+
+        When ``plan`` is given, the database is not written at all (a dry run).
+        Changes are computed in memory and recorded to the plan instead, it can
+        be applied later by ``apply_plan()``.
+        """
+        # The state is not created until the end, dry runs do not write anything.
+        sync_state = models.PretalxSyncState.objects.filter(
+            event_slug=self.client.event_slug
+        ).first() or models.PretalxSyncState(event_slug=self.client.event_slug)
+        started_at = timezone.now()
+        previous_submission_hashes = sync_state.submission_hashes if incremental else {}
+        previous_speaker_hashes = sync_state.speaker_hashes if incremental else {}
+
+        talks = self._load_existing(models.Talk)
+        workshops = self._load_existing(models.Workshop)
+        self._talks_order = max((talk.order for talk in talks.values()), default=0)
+        self._workshops_order = max(
+            (workshop.order for workshop in workshops.values()), default=0
+        )
+
+        def sync_submissions(
+            submissions: Iterable[dict[str, Any]]
+        ) -> tuple[dict[str, str], set[str], dict[str, list[str]]]:
+            submission_hashes: dict[str, str] = {}
+            confirmed_speaker_codes: set[str] = set()
+            # Speaker codes of the synced (changed) submissions, by submission code.
+            session_speaker_codes: dict[str, list[str]] = {}
+            for chunk in self._chunked(submissions):
+                changed_submissions = []
+                for submission_data in chunk:
+                    code = submission_data["code"]
+                    speaker_codes = [
+                        speaker_data["code"]
+                        for speaker_data in submission_data["speakers"]
+                    ]
+                    confirmed_speaker_codes.update(speaker_codes)
+                    submission_hash = pretalx.hash_payload(submission_data)
+                    submission_hashes[code] = submission_hash
+                    if previous_submission_hashes.get(code) == submission_hash and (
+                        code in talks or code in workshops
+                    ):
+                        self.metrics.record_rows(
+                            models.Talk if code in talks else models.Workshop,
+                            unchanged=1,
+                        )
+                        continue
+                    session_speaker_codes[code] = speaker_codes
+                    changed_submissions.append(submission_data)
+                if plan is None:
+                    self._sync_submissions(changed_submissions, talks, workshops)
+                else:
+                    self._plan_submissions(changed_submissions, talks, workshops, plan)
+            return submission_hashes, confirmed_speaker_codes, session_speaker_codes
+
+        def sync_speakers(
+            synced_submissions: tuple[dict[str, str], set[str], dict[str, list[str]]],
+            all_speakers: Iterable[dict[str, Any]],
+        ) -> tuple[dict[str, models.Speaker], dict[str, str]]:
+            _, confirmed_speaker_codes, _ = synced_submissions
+            speakers = self._load_existing(models.Speaker)
+            speaker_hashes: dict[str, str] = {}
+            for chunk in self._chunked(
+                self._fetch_speakers_by_code(confirmed_speaker_codes, all_speakers)
+            ):
+                changed_speakers = []
+                for speaker_data in chunk:
+                    code = speaker_data["code"]
+                    speaker_hashes[code] = pretalx.hash_payload(speaker_data)
+                    if (
+                        previous_speaker_hashes.get(code) == speaker_hashes[code]
+                        and code in speakers
+                    ):
+                        self.metrics.record_rows(models.Speaker, unchanged=1)
+                        continue
+                    changed_speakers.append(speaker_data)
+                if plan is None:
+                    self._sync_speakers(changed_speakers, speakers)
+                else:
+                    self._plan_speakers(changed_speakers, speakers, plan)
+            return speakers, speaker_hashes
+
+        def sync_session_speakers(
+            synced_submissions: tuple[dict[str, str], set[str], dict[str, list[str]]],
+            synced_speakers: tuple[dict[str, models.Speaker], dict[str, str]],
+        ) -> None:
+            submission_hashes, _, session_speaker_codes = synced_submissions
+            speakers, speaker_hashes = synced_speakers
+            if plan is not None:
+                self._plan_session_speakers(session_speaker_codes, plan)
+                plan.submission_hashes = submission_hashes
+                plan.speaker_hashes = speaker_hashes
+                return
+
+            self._sync_session_speakers(
+                session_speaker_codes, talks, workshops, speakers
+            )
+
+            sync_state.last_synced_at = started_at
+            sync_state.submission_hashes = submission_hashes
+            sync_state.speaker_hashes = speaker_hashes
+            sync_state.save()
+
+        scheduler = sync_scheduler.SyncScheduler()
+        # Speakers cannot be filtered by submissions in the API, all of them
+        # are downloaded while submissions are downloaded and written. They
+        # are filtered by the speaker stage once the codes are known.
+        all_speakers = scheduler.add_stream(max_size=SPEAKER_PREFETCH_SIZE)
+        if concurrent_fetch:
+            submissions = scheduler.add_stream(max_size=SYNC_CHUNK_SIZE)
+            scheduler.add(
+                "fetch_submissions",
+                lambda: self._fetch_concurrently(
+                    submissions,
+                    lambda async_client: async_client.list_submissions(
+                        questions=["all"],
+                        states=[pretalx.SubmissionState.CONFIRMED],
+                    ),
+                    pretalx.compact_submission,
+                ),
+                in_background=True,
+            )
+            scheduler.add(
+                "fetch_speakers",
+                lambda: self._fetch_concurrently(
+                    all_speakers,
+                    lambda async_client: async_client.list_speakers(questions=["all"]),
+                    pretalx.compact_speaker,
+                ),
+                in_background=True,
+            )
+        else:
+            submissions = self._fetch_submissions()
+            scheduler.add(
+                "fetch_speakers",
+                lambda: all_speakers.produce(self._fetch_all_speakers()),
+                in_background=True,
+            )
+        scheduler.add("sync_submissions", lambda: sync_submissions(submissions))
+        scheduler.add(
+            "sync_speakers",
+            lambda synced: sync_speakers(synced, all_speakers),
+            depends_on=["sync_submissions"],
+        )
+        scheduler.add(
+            "sync_session_speakers",
+            sync_session_speakers,
+            depends_on=["sync_submissions", "sync_speakers"],
+        )
+        scheduler.run()
+        self.metrics.record_stages(scheduler.started_at, scheduler.timings)
+        return scheduler.timings
+
+    def apply_plan(self, plan: sync_plan.SyncPlan) -> None:
         """
-        submissions = self._fetch_submissions()
-        confirmed_speaker_codes = self._extract_confirmed_speaker_codes(submissions)
-        speakers = self._fetch_speakers_by_code(confirmed_speaker_codes)
+        Applies changes planned by a dry run of ``full_sync()``. Data recorded
+        in the plan are used, nothing is downloaded from pretalx.
 
-        all_speakers = self._sync_speakers(speakers)
-        self._sync_submissions(submissions, all_speakers)
+        Objects are updated from the recorded data, so changes made in the
+        database after the plan was created are overwritten only when they
+        differ from pretalx.
+        """
+        if plan.event_slug != self.client.event_slug:
+            raise ValueError(
+                f"Plan for event {plan.event_slug!r} cannot be applied to event "
+                f"{self.client.event_slug!r}."
+            )
 
-    def _fetch_submissions(self) -> list[dict[str, Any]]:
-        # `list_submissions` returns an iterable that can be iterated only once.
-        # We want to use the list of confirmed submissions to filter speakers
-        # to update/create, therefore we need to convert it to a list
-        submissions = self.client.list_submissions(
-            questions=["all"], states=[pretalx.SubmissionState.CONFIRMED]
+        sync_state, _ = models.PretalxSyncState.objects.get_or_create(
+            event_slug=self.client.event_slug,
+        )
+        talks = self._load_existing(models.Talk)
+        workshops = self._load_existing(models.Workshop)
+        self._talks_order = max((talk.order for talk in talks.values()), default=0)
+        self._workshops_order = max(
+            (workshop.order for workshop in workshops.values()), default=0
         )
-        submissions = list(submissions)
-        return submissions
+        for chunk in self._chunked(plan.submissions):
+            self._sync_submissions(chunk, talks, workshops)
 
-    def _extract_confirmed_speaker_codes(
-        self, submissions: list[dict[str, Any]]
-    ) -> set[str]:
-        result = set()
-        for submission in submissions:
-            for speaker in submission["speakers"]:
-                result.add(speaker["code"])
-        return result
+        speakers = self._load_existing(models.Speaker)
+        for chunk in self._chunked(plan.speakers):
+            self._sync_speakers(chunk, speakers)
 
-    def _fetch_speakers_by_code(self, speaker_codes) -> list[dict[str, Any]]:
+        self._sync_session_speakers(
+            plan.session_speaker_codes, talks, workshops, speakers
+        )
+
+        sync_state.last_synced_at = timezone.now()
+        sync_state.submission_hashes = plan.submission_hashes
+        sync_state.speaker_hashes = plan.speaker_hashes
+        sync_state.save()
+
+    def _fetch_submissions(self) -> Iterator[dict[str, Any]]:
+        submissions = self.client.list_submissions(
+            questions=["all"],
+            states=[pretalx.SubmissionState.CONFIRMED],
+            parallel=True,
+        )
+        return map(pretalx.compact_submission, submissions)
+
+    def _fetch_all_speakers(self) -> Iterator[dict[str, Any]]:
         speakers = self.client.list_speakers(
             questions=["all"],
+            parallel=True,
         )
-        speakers = filter(
+        return map(pretalx.compact_speaker, speakers)
+
+    def _fetch_speakers_by_code(
+        self,
+        speaker_codes: Collection[str],
+        speakers: Iterable[dict[str, Any]],
+    ) -> Iterator[dict[str, Any]]:
+        return filter(
             lambda speaker_data: speaker_data["code"] in speaker_codes, speakers
         )
-        return list(speakers)
 
-    def _sync_speakers(self, speakers) -> dict[str, models.Speaker]:
-        existing_speakers = models.Speaker.objects.filter(
+    def _fetch_concurrently(
+        self,
+        stream: sync_scheduler.BoundedStream,
+        list_func: Callable[
+            [pretalx_async.AsyncPretalxClient], AsyncIterator[dict[str, Any]]
+        ],
+        compact_func: Callable[[dict[str, Any]], dict[str, Any]],
+    ) -> None:
+        """
+        Downloads results listed by ``list_func`` by ``AsyncPretalxClient`` in
+        an event loop of the calling thread, compacts them and puts them to
+        ``stream``. Each stream needs its own loop (thread), the loop is blocked
+        while the stream is full.
+        """
+
+        async def produce() -> None:
+            async_client = pretalx_async.AsyncPretalxClient(
+                self.client, max_concurrency=self.client.max_workers
+            )
+            results = list_func(async_client)
+            await stream.produce_async(compact_func(data) async for data in results)
+
+        try:
+            asyncio.run(produce())
+        except BaseException as exc:
+            # The loop might have failed before producing, do not keep
+            # the consumer waiting.
+            stream.finish(error=exc)
+            raise
+
+    def _chunked(
+        self, iterable: Iterable[dict[str, Any]]
+    ) -> Iterator[list[dict[str, Any]]]:
+        iterator = iter(iterable)
+        while chunk := list(itertools.islice(iterator, SYNC_CHUNK_SIZE)):
+            yield chunk
+
+    def _load_existing(
+        self, model_type: type[PretalxModel], codes: Collection[str] | None = None
+    ) -> dict[str, PretalxModel]:
+        queryset = model_type.objects.filter(
+            pretalx_event=self.client.event_slug,
             pretalx_code__isnull=False,
-        ).in_bulk(field_name="pretalx_code")
+        )
+        if codes is not None:
+            queryset = queryset.filter(pretalx_code__in=codes)
+        # Codes are unique within an event only, ``in_bulk()`` cannot be used.
+        return {obj.pretalx_code: obj for obj in queryset}
+
+    def _get_max_order(self, model_type: type[models.Session]) -> int:
+        return (
+            model_type.objects.aggregate(max_order=django_models.Max("order"))[
+                "max_order"
+            ]
+            or 0
+        )
+
+    def _sync_speakers(
+        self,
+        speakers_data: list[dict[str, Any]],
+        speakers: dict[str, models.Speaker],
+    ) -> None:
+        """
+        Creates or updates speakers. New speakers are added to the ``speakers``
+        dictionary.
+        """
         new_speakers: dict[str, models.Speaker] = {}
-        all_speakers = ChainMap(new_speakers, existing_speakers)
+        changes: list[tuple[models.Speaker, set[str]]] = []
 
-        for speaker_data in speakers:
+        for speaker_data in speakers_data:
             speaker_code = speaker_data["code"]
-            speaker = all_speakers.get(speaker_code)
+            speaker = speakers.get(speaker_code)
             if speaker is None:
                 speaker = models.Speaker(
                     is_public=False,
                     pretalx_code=speaker_code,
+                    pretalx_event=self.client.event_slug,
+                )
+                new_speakers[speaker_code] = speaker
+                self._update_from_pretalx(speaker, speaker_data)
+            else:
+                changes.append(
+                    (speaker, self._update_from_pretalx(speaker, speaker_data))
                 )
-                all_speakers[speaker_code] = speaker
-            speaker.update_from_pretalx(speaker_data)
 
         # Update existing speakers
-        models.Speaker.objects.bulk_update(
-            objs=existing_speakers.values(),
-            fields=models.Speaker.PRETALX_FIELDS,
-        )
+        self._bulk_update_changed(models.Speaker, changes)
         # Create new speakers
         models.Speaker.objects.bulk_create(new_speakers.values())
-
-        return dict(all_speakers)
+        self.metrics.record_rows(models.Speaker, created=len(new_speakers))
+        speakers.update(new_speakers)
+        self._sync_speaker_photos(
+            (speakers[speaker_data["code"]], speaker_data.get("avatar"))
+            for speaker_data in speakers_data
+        )
 
     def _sync_submissions(
-        self, submissions: list[dict[str, Any]], speakers: dict[str, models.Speaker]
-    ):
-        talks: list[dict[str, Any]] = []
-        workshops: list[dict[str, Any]] = []
+        self,
+        submissions: list[dict[str, Any]],
+        talks: dict[str, models.Talk],
+        workshops: dict[str, models.Workshop],
+    ) -> None:
+        talk_submissions: list[dict[str, Any]] = []
+        workshop_submissions: list[dict[str, Any]] = []
         for submission in submissions:
             type_ = models.Session.get_pretalx_submission_type(
                 submission["submission_type"]
             )
             if type_ == "talk":
-                talks.append(submission)
+                talk_submissions.append(submission)
             else:
-                workshops.append(submission)
+                workshop_submissions.append(submission)
 
-        self._sync_talks(talks, speakers)
-        self._sync_workshops(workshops, speakers)
+        self._sync_talks(talk_submissions, talks)
+        self._sync_workshops(workshop_submissions, workshops)
 
     def _sync_talks(
-        self, submissions: list[dict[str, Any]], speakers: dict[str, models.Speaker]
+        self,
+        submissions: list[dict[str, Any]],
+        talks: dict[str, models.Talk],
     ) -> None:
-        existing_talks = models.Talk.objects.filter(
-            pretalx_code__isnull=False,
-        ).in_bulk(field_name="pretalx_code")
-        self._talks_order = max(
-            (talk.order for talk in existing_talks.values()), default=0
-        )
+        """
+        Creates or updates talks. New talks are added to the ``talks`` dictionary.
+        """
         new_talks: dict[str, models.Talk] = {}
-        all_talks: MutableMapping[str, models.Talk] = ChainMap(
-            new_talks, existing_talks
-        )
+        all_talks: MutableMapping[str, models.Talk] = ChainMap(new_talks, talks)
 
+        changes: list[tuple[models.Talk, set[str]]] = []
         for submission_data in submissions:
-            self._update_talk(all_talks, submission_data)
+            is_existing = submission_data["code"] in talks
+            changed_fields = self._update_talk(all_talks, submission_data)
+            if is_existing:
+                changes.append((talks[submission_data["code"]], changed_fields))
 
-        models.Talk.objects.bulk_update(
-            objs=existing_talks.values(),
-            fields=models.Talk.PRETALX_FIELDS,
-        )
+        self._bulk_update_changed(models.Talk, changes)
         models.Talk.objects.bulk_create(new_talks.values())
-
-        for submission_data in submissions:
-            all_talks[submission_data["code"]].talk_speakers.set(
-                [
-                    speakers[speaker_data["code"]]
-                    for speaker_data in submission_data["speakers"]
-                ]
-            )
+        self.metrics.record_rows(models.Talk, created=len(new_talks))
+        talks.update(new_talks)
 
     def _sync_workshops(
-        self, submissions: list[dict[str, Any]], speakers: dict[str, models.Speaker]
+        self,
+        submissions: list[dict[str, Any]],
+        workshops: dict[str, models.Workshop],
     ) -> None:
-        existing_workshops = models.Workshop.objects.filter(
-            pretalx_code__isnull=False,
-        ).in_bulk(field_name="pretalx_code")
-        self._workshops_order = max(
-            (workshop.order for workshop in existing_workshops.values()), default=0
-        )
+        """
+        Creates or updates workshops. New workshops are added to the ``workshops``
+        dictionary.
+        """
         new_workshops: dict[str, models.Workshop] = {}
         all_workshops: MutableMapping[str, models.Workshop] = ChainMap(
-            new_workshops, existing_workshops
+            new_workshops, workshops
         )
 
+        changes: list[tuple[models.Workshop, set[str]]] = []
         for submission_data in submissions:
-            self._update_workshop(all_workshops, submission_data)
+            is_existing = submission_data["code"] in workshops
+            changed_fields = self._update_workshop(all_workshops, submission_data)
+            if is_existing:
+                changes.append((workshops[submission_data["code"]], changed_fields))
 
-        models.Workshop.objects.bulk_update(
-            objs=existing_workshops.values(),
-            fields=models.Workshop.PRETALX_FIELDS,
-        )
+        self._bulk_update_changed(models.Workshop, changes)
         models.Workshop.objects.bulk_create(new_workshops.values())
+        self.metrics.record_rows(models.Workshop, created=len(new_workshops))
+        workshops.update(new_workshops)
 
+    def _sync_session_speakers(
+        self,
+        session_speaker_codes: dict[str, list[str]],
+        talks: dict[str, models.Talk],
+        workshops: dict[str, models.Workshop],
+        speakers: dict[str, models.Speaker],
+    ) -> None:
+        talk_speakers: dict[int, list[models.Speaker]] = {}
+        workshop_speakers: dict[int, list[models.Speaker]] = {}
+        for submission_code, speaker_codes in session_speaker_codes.items():
+            session_speakers = [speakers[code] for code in speaker_codes]
+            if submission_code in talks:
+                talk_speakers[talks[submission_code].id] = session_speakers
+            else:
+                workshop_speakers[workshops[submission_code].id] = session_speakers
+
+        self._set_session_speakers(models.Speaker.talks.through, talk_speakers)
+        self._set_session_speakers(models.Speaker.workshops.through, workshop_speakers)
+
+    def _plan_submissions(
+        self,
+        submissions: list[dict[str, Any]],
+        talks: dict[str, models.Talk],
+        workshops: dict[str, models.Workshop],
+        plan: sync_plan.SyncPlan,
+    ) -> None:
+        """Records changes of talks and workshops to the plan, nothing is saved."""
         for submission_data in submissions:
-            all_workshops[submission_data["code"]].workshop_speakers.set(
-                [
-                    speakers[speaker_data["code"]]
-                    for speaker_data in submission_data["speakers"]
-                ]
+            code = submission_data["code"]
+            type_ = models.Session.get_pretalx_submission_type(
+                submission_data["submission_type"]
             )
+            session: models.Session | None
+            if type_ == "talk":
+                session = talks.get(code)
+                model_type = models.Talk
+            else:
+                session = workshops.get(code)
+                model_type = models.Workshop
+
+            if session is None:
+                session = model_type(
+                    pretalx_code=code, pretalx_event=self.client.event_slug
+                )
+                old_values = None
+            else:
+                old_values = session.get_pretalx_values()
+            changed_fields = self._update_from_pretalx(session, submission_data)
+            plan.record_change(session, old_values, changed_fields)
+            plan.submissions.append(submission_data)
+
+    def _plan_speakers(
+        self,
+        speakers_data: list[dict[str, Any]],
+        speakers: dict[str, models.Speaker],
+        plan: sync_plan.SyncPlan,
+    ) -> None:
+        """Records changes of speakers to the plan, nothing is saved."""
+        for speaker_data in speakers_data:
+            speaker = speakers.get(speaker_data["code"])
+            if speaker is None:
+                speaker = models.Speaker(
+                    pretalx_code=speaker_data["code"],
+                    pretalx_event=self.client.event_slug,
+                )
+                old_values = None
+            else:
+                old_values = speaker.get_pretalx_values()
+            changed_fields = self._update_from_pretalx(speaker, speaker_data)
+            plan.record_change(speaker, old_values, changed_fields)
+            plan.speakers.append(speaker_data)
+
+    def _plan_session_speakers(
+        self,
+        session_speaker_codes: dict[str, list[str]],
+        plan: sync_plan.SyncPlan,
+    ) -> None:
+        """Records changes of speakers assigned to sessions to the plan."""
+        plan.session_speaker_codes = session_speaker_codes
+
+        existing_codes: dict[str, set[str]] = defaultdict(set)
+        for through_model in (
+            models.Speaker.talks.through,
+            models.Speaker.workshops.through,
+        ):
+            session_field = self._get_session_field(through_model)
+            # All assignments are loaded by a single query, the number of codes
+            # might be too large for an IN clause.
+            rows = through_model.objects.filter(
+                **{
+                    f"{session_field.name}__pretalx_event": self.client.event_slug,
+                    f"{session_field.name}__pretalx_code__isnull": False,
+                }
+            ).values_list(
+                f"{session_field.name}__pretalx_code", "speaker__pretalx_code"
+            )
+            for submission_code, speaker_code in rows:
+                existing_codes[submission_code].add(speaker_code)
+
+        for submission_code, speaker_codes in session_speaker_codes.items():
+            wanted = set(speaker_codes)
+            existing = existing_codes[submission_code]
+            if wanted != existing:
+                plan.speakers_changes.append(
+                    sync_plan.SpeakersChange(
+                        submission_code=submission_code,
+                        added=sorted(wanted - existing),
+                        removed=sorted(existing - wanted),
+                    )
+                )
 
     def _update_talk(
         self,
         all_talks: MutableMapping[str, models.Talk],
         submission_data: dict[str, Any],
-    ):
+    ) -> set[str]:
         code = submission_data["code"]
         talk = all_talks.get(code)
 
@@ -253,17 +756,18 @@ class PretalxSync:
                 is_public=False,
                 is_backup=False,
                 pretalx_code=code,
+                pretalx_event=self.client.event_slug,
                 order=self._talks_order,
             )
             all_talks[code] = talk
 
-        talk.update_from_pretalx(submission_data)
+        return self._update_from_pretalx(talk, submission_data)
 
     def _update_workshop(
         self,
         all_workshops: MutableMapping[str, models.Workshop],
         submission_data: dict[str, Any],
-    ):
+    ) -> set[str]:
         code = submission_data["code"]
         workshop = all_workshops.get(code)
 
@@ -273,30 +777,229 @@ class PretalxSync:
                 is_public=False,
                 is_backup=False,
                 pretalx_code=code,
+                pretalx_event=self.client.event_slug,
                 order=self._workshops_order,
             )
             all_workshops[code] = workshop
 
-        workshop.update_from_pretalx(submission_data)
+        return self._update_from_pretalx(workshop, submission_data)
+
+    def _update_from_pretalx(
+        self, obj: models.PretalxSyncedModel, pretalx_data: dict[str, Any]
+    ) -> set[str]:
+        """
+        Updates the object using the shared answers decoder, returns names
+        of changed fields.
+        """
+        return obj.update_from_pretalx(
+            pretalx_data,
+            answers=self._answers_decoder.decode(pretalx_data["answers"]),
+        )
+
+    def _bulk_update_changed(
+        self,
+        model_type: type[models.PretalxSyncedModel],
+        changes: Iterable[tuple[models.PretalxSyncedModel, set[str]]],
+    ) -> None:
+        """
+        Saves changed fields of existing objects. Objects are grouped by the set
+        of changed fields and each group is saved by a single ``bulk_update()``.
+        Objects without any changes are not saved at all.
+        """
+        objects_by_fields: dict[tuple[str, ...], list] = defaultdict(list)
+        unchanged = 0
+        for obj, changed_fields in changes:
+            if changed_fields:
+                objects_by_fields[tuple(sorted(changed_fields))].append(obj)
+            else:
+                unchanged += 1
+
+        for fields, objs in objects_by_fields.items():
+            model_type.objects.bulk_update(objs=objs, fields=fields)
+        if objects_by_fields:
+            # Bulk updates do not send model signals.
+            schedule_snapshot.invalidate()
+        self.metrics.record_rows(
+            model_type,
+            updated=sum(len(objs) for objs in objects_by_fields.values()),
+            unchanged=unchanged,
+        )
+
+    def _set_session_speakers(
+        self,
+        through_model: type[django_models.Model],
+        session_speakers: dict[int, list[models.Speaker]],
+    ) -> None:
+        """
+        Sets speakers of sessions (talks or workshops) given by their IDs, this is
+        equivalent to calling ``set()`` on the many-to-many relation of each session.
+
+        All existing relations are loaded at once and the difference is applied by
+        a single ``bulk_create()`` and a single ``delete()``.
+        """
+        if not session_speakers:
+            return
+
+        session_field = self._get_session_field(through_model).attname
+        wanted = {
+            (session_id, speaker.id)
+            for session_id, speakers in session_speakers.items()
+            for speaker in speakers
+        }
+
+        existing: set[tuple[int, int]] = set()
+        obsolete_ids: list[int] = []
+        rows = through_model.objects.filter(
+            **{f"{session_field}__in": session_speakers.keys()}
+        ).values_list("id", session_field, "speaker_id")
+        for row_id, session_id, speaker_id in rows:
+            if (session_id, speaker_id) in wanted:
+                existing.add((session_id, speaker_id))
+            else:
+                obsolete_ids.append(row_id)
+
+        if obsolete_ids:
+            through_model.objects.filter(id__in=obsolete_ids).delete()
+        missing = wanted - existing
+        through_model.objects.bulk_create(
+            through_model(**{session_field: session_id, "speaker_id": speaker_id})
+            for session_id, speaker_id in missing
+        )
+        if missing or obsolete_ids:
+            schedule_snapshot.invalidate()
+        self.metrics.record_relations(
+            through_model, added=len(missing), removed=len(obsolete_ids)
+        )
+
+    def _get_session_field(
+        self, through_model: type[django_models.Model]
+    ) -> django_models.Field:
+        """
+        Returns the foreign key to the session (talk or workshop) in the "through"
+        model of speakers of sessions.
+        """
+        return next(
+            field
+            for field in through_model._meta.get_fields()
+            if field.is_relation and field.related_model is not models.Speaker
+        )
 
-    def _get_or_fetch_speaker(self, pretalx_code: str) -> models.Speaker:
+    def _get_or_fetch_speakers(
+        self, pretalx_codes: Iterable[str]
+    ) -> dict[str, models.Speaker]:
+        """
+        Returns speakers by their pretalx codes. Speakers missing in the database
+        are fetched in a batch (see ``PretalxClient.get_speakers()``) and created
+        by a single ``bulk_create()``.
+        """
         if self._existing_speakers is None:
-            self._existing_speakers = models.Speaker.objects.filter(
-                pretalx_code__isnull=False,
-            ).in_bulk(field_name="pretalx_code")
-
-        speaker = self._existing_speakers.get(pretalx_code)
-        if speaker is None:
-            speaker_data = self.client.get_speaker(
-                code=pretalx_code,
+            self._existing_speakers = self._load_existing(models.Speaker)
+
+        pretalx_codes = set(pretalx_codes)
+        missing_codes = pretalx_codes - self._existing_speakers.keys()
+        if missing_codes:
+            speakers_data = self.client.get_speakers(
+                codes=missing_codes,
                 questions=["all"],
             )
-            speaker = models.Speaker(
-                is_public=False,
-                pretalx_code=pretalx_code,
+            new_speakers: dict[str, models.Speaker] = {}
+            for speaker_code, speaker_data in speakers_data.items():
+                speaker = models.Speaker(
+                    is_public=False,
+                    pretalx_code=speaker_code,
+                    pretalx_event=self.client.event_slug,
+                )
+                self._update_from_pretalx(speaker, speaker_data)
+                new_speakers[speaker_code] = speaker
+
+            models.Speaker.objects.bulk_create(new_speakers.values())
+            self.metrics.record_rows(models.Speaker, created=len(new_speakers))
+            self._existing_speakers.update(new_speakers)
+            self._sync_speaker_photos(
+                (new_speakers[speaker_code], speaker_data.get("avatar"))
+                for speaker_code, speaker_data in speakers_data.items()
             )
-            speaker.update_from_pretalx(speaker_data)
-            speaker.save()
-            self._existing_speakers[pretalx_code] = speaker
 
-        return speaker
+        return {code: self._existing_speakers[code] for code in pretalx_codes}
+
+    def _sync_speaker_photos(
+        self, speaker_avatars: Iterable[tuple[models.Speaker, str | None]]
+    ) -> None:
+        """
+        Stores pretalx avatars as photos of the speakers, given as pairs of
+        a speaker and URL of their avatar.
+
+        Only avatars with a changed URL are downloaded (concurrently). Their content
+        is not known before that, so an image moved to a new URL is downloaded
+        again. Files are named by SHA-256 hash of their content, so the image is not
+        stored again. Photos uploaded in the admin are kept.
+        """
+        changed_speakers: dict[str, list[models.Speaker]] = defaultdict(list)
+        updated_speakers: list[models.Speaker] = []
+        for speaker, avatar_url in speaker_avatars:
+            avatar_url = avatar_url or ""
+            if avatar_url == speaker.pretalx_avatar_url or not self._has_pretalx_photo(
+                speaker
+            ):
+                continue
+            if avatar_url:
+                changed_speakers[avatar_url].append(speaker)
+            else:
+                # The avatar was removed in pretalx. The file is kept, other
+                # speakers might have the same photo.
+                speaker.photo = None
+                speaker.pretalx_avatar_url = ""
+                speaker.pretalx_avatar_hash = ""
+                updated_speakers.append(speaker)
+
+        if changed_speakers:
+            with ThreadPoolExecutor(
+                max_workers=self.client.max_workers,
+                thread_name_prefix="pretalx-avatar",
+            ) as executor:
+                avatars = dict(
+                    zip(
+                        changed_speakers,
+                        executor.map(self._download_avatar, changed_speakers),
+                    )
+                )
+        else:
+            avatars = {}
+
+        storage = models.Speaker._meta.get_field("photo").storage
+        for avatar_url, content in avatars.items():
+            if content is None:
+                continue
+            content_hash = hashlib.sha256(content).hexdigest()
+            suffix = self._get_photo_suffix(avatar_url)
+            name = f"{SPEAKER_PHOTO_PREFIX}{content_hash}{suffix}"
+            if not storage.exists(name):
+                name = storage.save(name, ContentFile(content))
+            for speaker in changed_speakers[avatar_url]:
+                speaker.photo = name
+                speaker.pretalx_avatar_url = avatar_url
+                speaker.pretalx_avatar_hash = content_hash
+                updated_speakers.append(speaker)
+
+        if updated_speakers:
+            models.Speaker.objects.bulk_update(
+                updated_speakers,
+                fields=["photo", "pretalx_avatar_url", "pretalx_avatar_hash"],
+            )
+            schedule_snapshot.invalidate()
+
+    def _has_pretalx_photo(self, speaker: models.Speaker) -> bool:
+        """Returns False when the speaker has a photo uploaded in the admin."""
+        return not speaker.photo or speaker.photo.name.startswith(SPEAKER_PHOTO_PREFIX)
+
+    def _download_avatar(self, avatar_url: str) -> bytes | None:
+        try:
+            return self.client.get_file(avatar_url)
+        except (requests.RequestException, pretalx.ResponseNotCachedError):
+            # Missing photo should not stop the sync, it will be retried next time.
+            logger.warning("Cannot download avatar %s.", avatar_url, exc_info=True)
+            return None
+
+    def _get_photo_suffix(self, avatar_url: str) -> str:
+        suffix = PurePosixPath(urllib.parse.urlsplit(avatar_url).path).suffix.lower()
+        return suffix if suffix in SPEAKER_PHOTO_SUFFIXES else ".jpg"
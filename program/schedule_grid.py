@@ -2,97 +2,159 @@ import dataclasses
 import datetime
 from typing import Iterable
 
-from program import models
-
 # Number of header rows: 1st row contains names of the rooms.
 HEADER_ROWS = 0
 # Number of header columns: 1st colum contains the timeline.
 HEADER_COLS = 0
 
 
+@dataclasses.dataclass(slots=True)
+class RoomRecord:
+    id: int
+    label: str
+    slug: str
+    order: int
+
+    def __str__(self) -> str:
+        return self.label
+
+
+@dataclasses.dataclass(slots=True)
+class SpeakerRecord:
+    full_name: str
+    photo_url: str
+    twitter: str
+    github: str
+    linkedin: str
+    personal_website: str
+
+
+@dataclasses.dataclass(slots=True)
+class EventRecord:
+    """
+    Talk, workshop or utility of a slot with only the data needed to render
+    the schedule. Session fields are empty for utilities.
+    """
+
+    kind: str
+    """``talk``, ``workshop`` or ``utility``."""
+    id: int
+    title: str
+    url: str | None
+    type: str = ""
+    is_keynote: bool = False
+    abstract: str = ""
+    track: str = ""
+    language: str = ""
+    minimum_python_knowledge: str = ""
+    minimum_topic_knowledge: str = ""
+    speakers: list[SpeakerRecord] = dataclasses.field(default_factory=list)
+    """Public speakers of the session."""
+    description: str | None = None
+    is_streamed: bool = False
+
+    def __str__(self) -> str:
+        return self.title
+
+    def get_absolute_url(self) -> str | None:
+        return self.url
+
+
+@dataclasses.dataclass(slots=True)
+class SlotRecord:
+    """Lightweight variant of ``models.Slot`` used to build schedule grids."""
+
+    id: int
+    start: datetime.datetime
+    end: datetime.datetime
+    room: RoomRecord
+    event: EventRecord
+
+    @property
+    def length(self) -> datetime.timedelta:
+        return self.end - self.start
+
+    def is_same_for_different_room(self, other_slot: "SlotRecord") -> bool:
+        """
+        Check if this is a slot for the same event, but in a different room.
+        """
+        return (
+            self.start == other_slot.start
+            and self.end == other_slot.end
+            and self.event.kind == other_slot.event.kind
+            and self.event.id == other_slot.event.id
+        )
+
+
 @dataclasses.dataclass()
 class ScheduleGrid:
     columns: list["ScheduleColumn"]
     rows: list["ScheduleRow"] = dataclasses.field(default_factory=list)
 
     @classmethod
-    def create_from_slots(cls, slots: Iterable[models.Slot]) -> "ScheduleGrid":
+    def create_from_slots(cls, slots: Iterable[SlotRecord]) -> "ScheduleGrid":
         """
-        Create a schedule grid from slots. The slots MUST be sorted
-        by ``start`` and ``room__order``.
+        Create a schedule grid from slots in a single pass. The slots MUST be
+        sorted by ``start`` and ``room.order``.
         """
-
-        # Create a set with unique rooms from the list of slots,
-        # convert it to list and sort the list by room order.
-        rooms = list({slot.room for slot in slots})
-        rooms.sort(key=lambda room: room.order)
-
-        # Calculate room offsets. The first column is reserved for time,
-        # start counting at 2.
-        room_offsets = {
-            room: offset for offset, room in enumerate(rooms, start=HEADER_COLS + 1)
-        }
-
-        grid = ScheduleGrid(
-            columns=[
-                ScheduleColumn(offset=room_offsets[room], room=room) for room in rooms
-            ]
-        )
-
-        # Create a dictionary of all rows and compute their offsets.
-        rows = {}
-        offset = HEADER_ROWS
-        for slot in slots:
-            if slot.start in rows:
-                continue
-            offset += 1
-            rows[slot.start] = ScheduleRow(
-                offset=offset,
-                time=slot.start,
-            )
-
-        # Populate the rows with items.
-        last_item: ScheduleItem | None = None
-        last_row_time = max(rows.keys()) if rows else None
+        rooms: dict[int, RoomRecord] = {}
+        rows: dict[datetime.datetime, ScheduleRow] = {}
+        # Items with the last room they span, columns are assigned when all rooms
+        # are known.
+        placements: list[tuple[ScheduleItem, RoomRecord]] = []
         for slot in slots:
+            rooms.setdefault(slot.room.id, slot.room)
+
             # If the last item was the same event, but in a different room,
             # expand the previous slot to the current room.
-            if last_item and slot.is_same_for_different_room(last_item.slot):
-                last_item.column_end = room_offsets[slot.room] + 1
-
+            if placements and slot.is_same_for_different_room(placements[-1][0].slot):
+                last_item = placements[-1][0]
+                placements[-1] = (last_item, slot.room)
                 if last_item.is_talk:
                     last_item.is_streamed = True
-
                 continue
 
-            item_row = rows[slot.start]
-
-            if last_row_time and slot.end > last_row_time:
-                end_row = rows.get(last_row_time)
-                grid_row_end = end_row.offset + 1
-            else:
-                end_row = rows.get(slot.end)
-                grid_row_end = (
-                    end_row.offset if end_row is not None else item_row.offset + 1
+            item_row = rows.get(slot.start)
+            if item_row is None:
+                item_row = ScheduleRow(
+                    offset=HEADER_ROWS + len(rows) + 1,
+                    time=slot.start,
                 )
+                rows[slot.start] = item_row
 
-            item = ScheduleItem(
-                row_start=item_row.offset,
-                row_end=grid_row_end,
-                column_start=room_offsets[slot.room],
-                column_end=room_offsets[slot.room] + 1,
-                slot=slot,
-            )
-            if item.is_utility and item.slot.event.is_streamed:
-                item.is_streamed = True
-
+            item = ScheduleItem.create(row_start=item_row.offset, slot=slot)
             item_row.items.append(item)
-            last_item = item
+            placements.append((item, slot.room))
 
-        # Assign rows to the grid
-        grid.rows = list(rows.values())
+        # Calculate room offsets. The first column is reserved for time,
+        # start counting at 2.
+        sorted_rooms = sorted(rooms.values(), key=lambda room: room.order)
+        room_offsets = {
+            room.id: offset
+            for offset, room in enumerate(sorted_rooms, start=HEADER_COLS + 1)
+        }
+
+        # Rows are created in order of time, the last one is the latest.
+        last_row = next(reversed(rows.values()), None)
+        for item, last_room in placements:
+            item.column_start = room_offsets[item.slot.room.id]
+            item.column_end = room_offsets[last_room.id] + 1
 
-        return grid
+            if last_row is not None and item.slot.end > last_row.time:
+                item.row_end = last_row.offset + 1
+            else:
+                end_row = rows.get(item.slot.end)
+                item.row_end = (
+                    end_row.offset if end_row is not None else item.row_start + 1
+                )
+
+        return ScheduleGrid(
+            columns=[
+                ScheduleColumn(offset=room_offsets[room.id], room=room)
+                for room in sorted_rooms
+            ],
+            rows=list(rows.values()),
+        )
 
     def pop_row(self, index: int = 0) -> "ScheduleRow":
         result = self.rows.pop(index)
@@ -109,7 +171,7 @@ class ScheduleGrid:
 @dataclasses.dataclass()
 class ScheduleColumn:
     offset: int
-    room: models.Room
+    room: RoomRecord
 
     @property
     def grid_area(self):
@@ -126,14 +188,43 @@ class ScheduleRow:
         return all(item.is_utility and not item.is_streamed for item in self.items)
 
 
-@dataclasses.dataclass()
+@dataclasses.dataclass(slots=True)
 class ScheduleItem:
     row_start: int
     row_end: int
     column_start: int
     column_end: int
-    slot: models.Slot
+    slot: SlotRecord
     is_streamed: bool = False
+    # Type flags are computed once, templates access them repeatedly.
+    is_talk: bool = False
+    is_workshop: bool = False
+    is_utility: bool = False
+    type: str = "utility"
+
+    @classmethod
+    def create(cls, row_start: int, slot: SlotRecord) -> "ScheduleItem":
+        """
+        Create an item in the row, its end and columns are set by the grid.
+        """
+        event = slot.event
+        item = cls(
+            row_start=row_start,
+            row_end=row_start + 1,
+            column_start=0,
+            column_end=0,
+            slot=slot,
+            is_talk=event.kind == "talk",
+            is_workshop=event.kind == "workshop",
+            is_utility=event.kind == "utility",
+        )
+        if item.is_talk and event.is_keynote:
+            item.type = "keynote"
+        elif not item.is_utility:
+            item.type = event.type
+        if item.is_utility and event.is_streamed:
+            item.is_streamed = True
+        return item
 
     @property
     def grid_area(self):
@@ -142,27 +233,6 @@ class ScheduleItem:
             f"{self.row_end} / {self.column_end}"
         )
 
-    @property
-    def is_talk(self):
-        return isinstance(self.slot.event, models.Talk)
-
-    @property
-    def is_workshop(self):
-        return isinstance(self.slot.event, models.Workshop)
-
-    @property
-    def is_utility(self):
-        return isinstance(self.slot.event, models.Utility)
-
     @property
     def is_multi_room(self):
         return (self.column_end - self.column_start) > 1
-
-    @property
-    def type(self):
-        event = self.slot.event
-        if isinstance(event, models.Talk) and event.is_keynote:
-            return "keynote"
-        if isinstance(event, (models.Talk, models.Workshop)):
-            return event.type
-        return "utility"
@@ -5,11 +5,12 @@ from dataclasses import dataclass
 from typing import Any, Iterable
 
 import openpyxl
+from django.conf import settings
 from django.utils import timezone
 from django.utils.text import slugify
 from openpyxl.worksheet.merge import MergedCellRange
 
-from program import models, views
+from program import models, schedule_snapshot, views
 
 ROOM_CAPACITY_SUFFIX = r"\s+\d+$"
 PRETALX_CODE_PATTERN = r"^[A-Z0-9]{6}$"
@@ -117,12 +118,20 @@ class ScheduleImporter:
 
 class ImportBatch:
     def __init__(self):
-        self._talks = models.Talk.objects.filter(pretalx_code__isnull=False).in_bulk(
-            field_name="pretalx_code"
-        )
-        self._workshops = models.Workshop.objects.filter(
-            pretalx_code__isnull=False
-        ).in_bulk(field_name="pretalx_code")
+        # The schedule is imported for the current event only, codes of other
+        # events may collide.
+        self._talks = {
+            talk.pretalx_code: talk
+            for talk in models.Talk.objects.filter(
+                pretalx_event=settings.PRETALX_EVENT_SLUG, pretalx_code__isnull=False
+            )
+        }
+        self._workshops = {
+            workshop.pretalx_code: workshop
+            for workshop in models.Workshop.objects.filter(
+                pretalx_event=settings.PRETALX_EVENT_SLUG, pretalx_code__isnull=False
+            )
+        }
         self._existing_rooms = {room.label: room for room in models.Room.objects.all()}
         self._new_rooms = {}
         self._all_rooms = collections.ChainMap(self._new_rooms, self._existing_rooms)
@@ -174,6 +183,7 @@ class ImportBatch:
 
     def bulk_create_slots(self) -> None:
         models.Slot.objects.bulk_create(self._slots)
+        schedule_snapshot.invalidate()
 
     def get_new_objects(self) -> list[models.Room | models.Utility | models.Slot]:
         return [
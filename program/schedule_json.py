@@ -0,0 +1,240 @@
+"""
+Encoding of the schedule to ``schedule.json``.
+
+Slots are converted to JSON-compatible data once per schedule snapshot. Each
+variant of the response (day, room and selected session fields) is encoded
+only once as well and its bytes are kept with the snapshot, responses just
+stream the cached bytes.
+
+Clients can ask only for slots changed since a version of the program data
+(``since``). Versions of changes of individual slots are tracked by comparing
+content hashes with the previous snapshot, see ``track_changes()``. Changes are
+known only since the version in which the tracking started, e.g. after the
+history was lost from the cache.
+"""
+import dataclasses
+import datetime
+import hashlib
+import json
+from collections.abc import Iterator
+from typing import Any
+
+from django.utils import timezone
+
+from program.schedule_grid import EventRecord, ScheduleGrid
+
+SESSION_FIELDS = (
+    "title",
+    "type",
+    "abstract",
+    "track",
+    "language",
+    "minimum_python_knowledge",
+    "minimum_topic_knowledge",
+    "speakers",
+)
+"""Fields of sessions which can be selected by the ``fields`` parameter."""
+
+MAX_CACHED_VARIANTS = 64
+"""Maximum number of encoded variants kept with a snapshot."""
+
+ITEMS_PER_CHUNK = 50
+"""Number of slots sent in a single chunk of the streamed response."""
+
+
+@dataclasses.dataclass(frozen=True)
+class ScheduleQuery:
+    date: datetime.date | None = None
+    """Only slots starting on the (local) date."""
+    room: str | None = None
+    """Only slots in the room with the slug."""
+    fields: tuple[str, ...] = SESSION_FIELDS
+    """Fields of sessions to include."""
+    since: int | None = None
+    """Only slots changed after the version, removed slots are listed."""
+
+    @property
+    def variant(self) -> tuple:
+        return self.date, self.room, self.fields
+
+
+@dataclasses.dataclass()
+class ScheduleJsonItem:
+    slot_id: int
+    date: datetime.date
+    rooms: frozenset[str]
+    """Slugs of all rooms of the item, it may span more rooms."""
+    data: dict[str, Any]
+    content_hash: str = ""
+    changed_in: int = 0
+    """Version of the program data in which the item was last changed."""
+
+    def matches(self, query: ScheduleQuery) -> bool:
+        if query.date is not None and self.date != query.date:
+            return False
+        if query.room is not None and query.room not in self.rooms:
+            return False
+        return True
+
+    def encode(self, fields: tuple[str, ...]) -> bytes:
+        data = dict(self.data)
+        session = data["session"]
+        data["session"] = {
+            field: session[field] for field in fields if field in session
+        }
+        return json.dumps(data).encode()
+
+
+class ScheduleJson:
+    """
+    JSON items of a schedule snapshot and cache of their encoded variants.
+    """
+
+    def __init__(
+        self,
+        version: int,
+        items: list[ScheduleJsonItem],
+        removed: dict[int, int],
+        tracked_since: int,
+    ) -> None:
+        self.version = version
+        self.items = items
+        self.removed = removed
+        """Versions in which slots were removed, by slot IDs."""
+        self.tracked_since = tracked_since
+        """Version since which changes of slots are known."""
+        self._encoded: dict[tuple, list[tuple[ScheduleJsonItem, bytes]]] = {}
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Encoded variants are kept only in the memory of the process.
+        return dict(self.__dict__, _encoded={})
+
+    def encode(self, query: ScheduleQuery) -> Iterator[bytes]:
+        """Returns chunks of the encoded ``schedule.json``."""
+        encoded = self._get_encoded_variant(query)
+        if query.since is not None:
+            encoded = [
+                (item, data) for item, data in encoded if item.changed_in > query.since
+            ]
+
+        yield b'{"version": %d, "schedule": [' % self.version
+        for start in range(0, len(encoded), ITEMS_PER_CHUNK):
+            chunk = b", ".join(
+                data for _, data in encoded[start : start + ITEMS_PER_CHUNK]
+            )
+            yield chunk if start == 0 else b", " + chunk
+        yield b"]"
+
+        if query.since is not None:
+            removed = sorted(
+                slot_id
+                for slot_id, version in self.removed.items()
+                if version > query.since
+            )
+            yield b', "removed": ' + json.dumps(removed).encode()
+        yield b"}"
+
+    def _get_encoded_variant(
+        self, query: ScheduleQuery
+    ) -> list[tuple[ScheduleJsonItem, bytes]]:
+        encoded = self._encoded.get(query.variant)
+        if encoded is None:
+            if len(self._encoded) >= MAX_CACHED_VARIANTS:
+                self._encoded.clear()
+            encoded = [
+                (item, item.encode(query.fields))
+                for item in self.items
+                if item.matches(query)
+            ]
+            self._encoded[query.variant] = encoded
+        return encoded
+
+
+def create_items(grid: ScheduleGrid) -> list[ScheduleJsonItem]:
+    items = []
+    for row in grid.rows:
+        for item in row.items:
+            json_item = ScheduleJsonItem(
+                slot_id=item.slot.id,
+                date=timezone.localdate(item.slot.start),
+                rooms=frozenset(
+                    column.room.slug
+                    for column in grid.columns
+                    if item.column_start <= column.offset < item.column_end
+                ),
+                data={
+                    "id": item.slot.id,
+                    "start": item.slot.start.isoformat(),
+                    "end": item.slot.end.isoformat(),
+                    "room": item.slot.room.label,
+                    "is_streamed": item.is_streamed,
+                    "session": _create_session_data(item.slot.event),
+                },
+            )
+            json_item.content_hash = hashlib.sha256(
+                json_item.encode(SESSION_FIELDS)
+            ).hexdigest()
+            items.append(json_item)
+    return items
+
+
+def track_changes(
+    items: list[ScheduleJsonItem],
+    version: int,
+    changes: dict[int, tuple[str | None, int]],
+) -> dict[int, int]:
+    """
+    Sets ``changed_in`` of the items. ``changes`` contain content hashes (None
+    for removed slots) and versions of the last change by slot IDs, they are
+    updated by the items. Returns versions of removal by IDs of removed slots.
+    """
+    current_ids = set()
+    for item in items:
+        current_ids.add(item.slot_id)
+        content_hash, changed_in = changes.get(item.slot_id, (None, version))
+        if content_hash != item.content_hash:
+            changed_in = version
+        item.changed_in = changed_in
+        changes[item.slot_id] = (item.content_hash, changed_in)
+
+    removed = {}
+    for slot_id, (content_hash, changed_in) in changes.items():
+        if slot_id in current_ids:
+            continue
+        if content_hash is not None:
+            changed_in = version
+            changes[slot_id] = (None, changed_in)
+        removed[slot_id] = changed_in
+    return removed
+
+
+def _create_session_data(event: EventRecord) -> dict[str, Any]:
+    session_json = {
+        "title": event.title,
+    }
+    if event.kind in {"talk", "workshop"}:
+        session_json.update(
+            {
+                "type": event.type,
+                "abstract": event.abstract,
+                "track": event.track,
+                "language": event.language,
+                "minimum_python_knowledge": event.minimum_python_knowledge,
+                "minimum_topic_knowledge": event.minimum_topic_knowledge,
+                "speakers": [
+                    {
+                        "name": speaker.full_name,
+                        "twitter": speaker.twitter if speaker.twitter else None,
+                        "github": speaker.github if speaker.github else None,
+                        "linkedin": speaker.linkedin if speaker.linkedin else None,
+                        "personal_website": speaker.personal_website
+                        if speaker.personal_website
+                        else None,
+                    }
+                    for speaker in event.speakers
+                ],
+            }
+        )
+    else:
+        session_json["type"] = "other"
+    return session_json
@@ -0,0 +1,278 @@
+"""
+Materialized schedule shared by the schedule views.
+
+All slots with their sessions, rooms and public speakers are loaded from the
+database once per version of the program data. The snapshot is stored in the
+``program`` cache (shared by all processes) and kept in the memory of each
+process, so schedule pages do not query the database until the program changes.
+Rendered HTML of schedule days is cached in the same cache, keyed by the version.
+Keys of the cache are prefixed by ``RELEASE`` (see ``CACHES`` in settings), so
+data pickled by a previous release are never loaded.
+
+The version is changed by ``invalidate()`` when any program model is saved or
+deleted, see ``connect_signals()``. Code writing program data in bulk (bypassing
+model signals) must call ``invalidate()`` itself.
+"""
+import dataclasses
+import datetime
+import time
+
+from django.core.cache import caches
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.urls import reverse
+from django.utils import timezone
+
+from program import models, schedule_json
+from program.schedule_grid import (
+    EventRecord,
+    RoomRecord,
+    ScheduleGrid,
+    SlotRecord,
+    SpeakerRecord,
+)
+
+CACHE_ALIAS = "program"
+VERSION_KEY = "schedule:version"
+SNAPSHOT_KEY = "schedule:snapshot:{version}"
+SLOT_CHANGES_KEY = "schedule:slot-changes"
+SNAPSHOT_TIMEOUT = 24 * 60 * 60
+"""
+Snapshots (and rendered schedule fragments) of old versions expire from the cache
+after a day.
+"""
+
+SCHEDULE_MODELS = (
+    models.Slot,
+    models.Talk,
+    models.Workshop,
+    models.Utility,
+    models.Room,
+    models.Speaker,
+)
+"""Changes of these models invalidate the schedule snapshot."""
+
+
+@dataclasses.dataclass()
+class ScheduleSnapshot:
+    version: int
+    """Version of the program data, microseconds since the epoch of the change."""
+    slots: list[SlotRecord]
+    """All slots sorted by ``start`` and ``room__order``."""
+    grid: ScheduleGrid
+    """Grid of all slots, the grid is shared and must not be modified."""
+    day_grids: dict[datetime.date, ScheduleGrid]
+    """Grids of slots by (local) date, the grids are shared and must not be modified."""
+    json: schedule_json.ScheduleJson
+
+    @classmethod
+    def build(cls, version: int) -> "ScheduleSnapshot":
+        slots = load_slot_records()
+
+        slots_by_date: dict[datetime.date, list[SlotRecord]] = {}
+        for slot in slots:
+            slots_by_date.setdefault(timezone.localdate(slot.start), []).append(slot)
+
+        grid = ScheduleGrid.create_from_slots(slots)
+        json_items = schedule_json.create_items(grid)
+        cache = caches[CACHE_ALIAS]
+        # Without the history (e.g. culled from the cache), changes are tracked
+        # from the current version.
+        tracked_since, slot_changes = cache.get(SLOT_CHANGES_KEY) or (version, {})
+        removed = schedule_json.track_changes(json_items, version, slot_changes)
+        cache.set(SLOT_CHANGES_KEY, (tracked_since, slot_changes), timeout=None)
+
+        return cls(
+            version=version,
+            slots=slots,
+            grid=grid,
+            day_grids={
+                date: ScheduleGrid.create_from_slots(day_slots)
+                for date, day_slots in slots_by_date.items()
+            },
+            json=schedule_json.ScheduleJson(
+                version, json_items, removed, tracked_since
+            ),
+        )
+
+    def get_day_grid(self, date: datetime.date) -> ScheduleGrid:
+        grid = self.day_grids.get(date)
+        if grid is None:
+            return ScheduleGrid(columns=[])
+        return grid
+
+    def get_session_slot(self, session: models.Session) -> SlotRecord | None:
+        """
+        Returns the first slot of the session. Other slots of the session are
+        for streaming to other rooms.
+        """
+        kind = "talk" if isinstance(session, models.Talk) else "workshop"
+        for slot in self.slots:
+            if slot.event.kind == kind and slot.event.id == session.id:
+                return slot
+        return None
+
+    def get_slots_between(
+        self, start: datetime.datetime, end: datetime.datetime
+    ) -> list[SlotRecord]:
+        """Returns slots starting in the interval (including both ends)."""
+        return [slot for slot in self.slots if start <= slot.start <= end]
+
+
+def load_slot_records() -> list[SlotRecord]:
+    """
+    Loads all slots sorted by ``start`` and ``room__order`` as records. Only the
+    needed columns are loaded, by one query per model.
+    """
+    speakers: dict[tuple[str, int], list[SpeakerRecord]] = {}
+    for kind, through_model in (
+        ("talk", models.Speaker.talks.through),
+        ("workshop", models.Speaker.workshops.through),
+    ):
+        rows = (
+            through_model.objects.filter(speaker__is_public=True)
+            .order_by("speaker__order", "speaker_id")
+            .values_list(
+                f"{kind}_id",
+                "speaker__full_name",
+                "speaker__photo",
+                "speaker__twitter",
+                "speaker__github",
+                "speaker__linkedin",
+                "speaker__personal_website",
+            )
+        )
+        for session_id, full_name, photo, *links in rows:
+            speakers.setdefault((kind, session_id), []).append(
+                SpeakerRecord(
+                    full_name,
+                    default_storage.url(photo) if photo else "",
+                    *links,
+                )
+            )
+
+    events: dict[tuple[str, int], EventRecord] = {}
+    for kind, model_type in (("talk", models.Talk), ("workshop", models.Workshop)):
+        sessions = model_type.objects.filter(slot__isnull=False).distinct()
+        for session in sessions.values(
+            "id",
+            "title",
+            "type",
+            "abstract",
+            "track",
+            "language",
+            "minimum_python_knowledge",
+            "minimum_topic_knowledge",
+            *(["is_keynote"] if kind == "talk" else []),
+        ):
+            events[(kind, session["id"])] = EventRecord(
+                kind=kind,
+                url=reverse(
+                    "program:session_detail",
+                    kwargs={"type": session["type"], "session_id": session["id"]},
+                ),
+                speakers=speakers.get((kind, session["id"]), []),
+                **session,
+            )
+    for utility in models.Utility.objects.values(
+        "id", "title", "url", "description", "is_streamed"
+    ):
+        events[("utility", utility["id"])] = EventRecord(
+            kind="utility", url=utility.pop("url") or None, **utility
+        )
+
+    rooms = {
+        room["id"]: RoomRecord(**room)
+        for room in models.Room.objects.values("id", "label", "slug", "order")
+    }
+    slots = models.Slot.objects.order_by("start", "room__order").values_list(
+        "id", "start", "end", "room_id", "talk_id", "workshop_id", "utility_id"
+    )
+    result = []
+    for slot_id, start, end, room_id, talk_id, workshop_id, utility_id in slots:
+        if talk_id is not None:
+            event = events[("talk", talk_id)]
+        elif workshop_id is not None:
+            event = events[("workshop", workshop_id)]
+        elif utility_id is not None:
+            event = events[("utility", utility_id)]
+        else:
+            event = EventRecord(kind="", id=0, title="", url=None)
+        result.append(
+            SlotRecord(
+                id=slot_id, start=start, end=end, room=rooms[room_id], event=event
+            )
+        )
+    return result
+
+
+_local_snapshot: ScheduleSnapshot | None = None
+
+
+def get_snapshot() -> ScheduleSnapshot:
+    """
+    Returns the snapshot of the current version, it is built when it is not
+    cached yet.
+    """
+    global _local_snapshot
+
+    version = get_version()
+    snapshot = _local_snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    cache = caches[CACHE_ALIAS]
+    key = SNAPSHOT_KEY.format(version=version)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = ScheduleSnapshot.build(version)
+        cache.set(key, snapshot, SNAPSHOT_TIMEOUT)
+
+    _local_snapshot = snapshot
+    return snapshot
+
+
+def get_version() -> int:
+    cache = caches[CACHE_ALIAS]
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Keep the version when another process has just set it.
+        cache.add(VERSION_KEY, _create_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def get_changed_at(version: int) -> datetime.datetime:
+    """Returns the time of the change which started the version."""
+    return datetime.datetime.fromtimestamp(
+        version / 1_000_000, tz=datetime.timezone.utc
+    )
+
+
+def invalidate() -> None:
+    """
+    Starts a new version of the program data when the current transaction
+    is committed, so the new snapshot is not built from uncommitted data.
+    """
+    transaction.on_commit(_set_new_version)
+
+
+def connect_signals() -> None:
+    for model_type in SCHEDULE_MODELS:
+        post_save.connect(_on_model_change, sender=model_type)
+        post_delete.connect(_on_model_change, sender=model_type)
+    m2m_changed.connect(_on_model_change, sender=models.Speaker.talks.through)
+    m2m_changed.connect(_on_model_change, sender=models.Speaker.workshops.through)
+
+
+def _on_model_change(**kwargs) -> None:
+    invalidate()
+
+
+def _set_new_version() -> None:
+    caches[CACHE_ALIAS].set(VERSION_KEY, _create_version(), timeout=None)
+
+
+def _create_version() -> int:
+    return time.time_ns() // 1000
@@ -0,0 +1,175 @@
+import bisect
+import datetime
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+import sentry_sdk
+from django.db import connection
+from django.db import models as django_models
+
+from program.sync_scheduler import StageTiming
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+"""Upper bounds (in seconds) of buckets of the request latency histograms."""
+
+
+@dataclass
+class RequestStats:
+    count: int = 0
+    errors: int = 0
+    not_modified: int = 0
+    bytes_received: int = 0
+    total_latency: float = 0.0
+    latency_histogram: list[int] = field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1)
+    )
+
+
+@dataclass
+class RowStats:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+
+@dataclass
+class RelationStats:
+    added: int = 0
+    removed: int = 0
+
+
+class SyncMetrics:
+    """
+    Collects metrics of a synchronization with pretalx: HTTP requests by endpoint,
+    database rows by model, changes of many-to-many relations, number of database
+    queries and timings of sync stages.
+
+    Requests may be recorded from more threads at once.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests: dict[str, RequestStats] = {}
+        self.rows: dict[str, RowStats] = {}
+        self.relations: dict[str, RelationStats] = {}
+        self.db_queries = 0
+        self.rate_limit_wait = 0.0
+        self.stages: dict[str, StageTiming] = {}
+        self.started_at: datetime.datetime | None = None
+
+    def record_request(
+        self,
+        endpoint: str,
+        status_code: int,
+        bytes_received: int,
+        latency: float,
+    ) -> None:
+        with self._lock:
+            stats = self.requests.setdefault(endpoint, RequestStats())
+            stats.count += 1
+            if status_code >= 400:
+                stats.errors += 1
+            elif status_code == 304:
+                stats.not_modified += 1
+            stats.bytes_received += bytes_received
+            stats.total_latency += latency
+            stats.latency_histogram[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+    def record_rate_limit_wait(self, seconds: float) -> None:
+        """Records time spent waiting for the rate limiter of the client."""
+        if seconds:
+            with self._lock:
+                self.rate_limit_wait += seconds
+
+    def record_rows(
+        self,
+        model_type: type[django_models.Model],
+        created: int = 0,
+        updated: int = 0,
+        unchanged: int = 0,
+    ) -> None:
+        stats = self.rows.setdefault(model_type._meta.label, RowStats())
+        stats.created += created
+        stats.updated += updated
+        stats.unchanged += unchanged
+
+    def record_relations(
+        self,
+        through_model: type[django_models.Model],
+        added: int = 0,
+        removed: int = 0,
+    ) -> None:
+        stats = self.relations.setdefault(through_model._meta.label, RelationStats())
+        stats.added += added
+        stats.removed += removed
+
+    def record_stages(
+        self, started_at: datetime.datetime, stages: dict[str, StageTiming]
+    ) -> None:
+        self.started_at = started_at
+        self.stages.update(stages)
+
+    @contextmanager
+    def count_queries(self) -> Iterator[None]:
+        """Counts database queries executed in the block (by the current thread)."""
+
+        def count_query(execute: Callable, sql, params, many, context) -> Any:
+            self.db_queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_query):
+            yield
+
+    def to_dict(self) -> dict[str, Any]:
+        """Summary of the collected metrics, can be serialized to JSON."""
+        latency_labels = [f"<={bound}" for bound in LATENCY_BUCKETS]
+        latency_labels.append(f">{LATENCY_BUCKETS[-1]}")
+        return {
+            "requests": {
+                endpoint: {
+                    **asdict(stats),
+                    "latency_histogram": dict(
+                        zip(latency_labels, stats.latency_histogram)
+                    ),
+                }
+                for endpoint, stats in sorted(self.requests.items())
+            },
+            "rows": {model: asdict(stats) for model, stats in self.rows.items()},
+            "relations": {
+                model: asdict(stats) for model, stats in self.relations.items()
+            },
+            "db_queries": self.db_queries,
+            "rate_limit_wait": self.rate_limit_wait,
+            "stages": {
+                name: {"started": timing.started, "duration": timing.duration}
+                for name, timing in self.stages.items()
+            },
+        }
+
+    def report_to_sentry(self) -> None:
+        """
+        Adds the summary and spans of sync stages to the current Sentry
+        transaction. Does nothing when there is no transaction.
+        """
+        parent_span = sentry_sdk.Hub.current.scope.span
+        if parent_span is None:
+            return
+
+        parent_span.set_data("pretalx_sync", self.to_dict())
+        if self.started_at is None:
+            return
+
+        for timing in self.stages.values():
+            span = parent_span.start_child(
+                op="pretalx.sync.stage",
+                description=timing.name,
+                start_timestamp=self.started_at
+                + datetime.timedelta(seconds=timing.started),
+            )
+            span.finish(
+                end_timestamp=self.started_at
+                + datetime.timedelta(seconds=timing.finished)
+            )
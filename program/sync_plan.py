@@ -0,0 +1,116 @@
+import dataclasses
+import json
+from typing import Any
+
+from program import models
+
+
+@dataclasses.dataclass
+class FieldChange:
+    old: Any
+    new: Any
+
+
+@dataclasses.dataclass
+class ObjectChange:
+    model: str
+    """Label of the model, e.g. ``program.Talk``."""
+    pretalx_code: str
+    action: str
+    """Either ``create`` or ``update``."""
+    fields: dict[str, FieldChange]
+
+
+@dataclasses.dataclass
+class SpeakersChange:
+    submission_code: str
+    added: list[str]
+    removed: list[str]
+
+
+@dataclasses.dataclass
+class SyncPlan:
+    """
+    Changes to be made by ``PretalxSync.full_sync()``, computed without writing
+    to the database (a dry run).
+
+    Besides the field-level diff, the plan keeps (compact) pretalx data of all
+    changed objects and content hashes of all objects, so it can be applied
+    later by ``PretalxSync.apply_plan()`` without downloading anything again.
+    """
+
+    event_slug: str
+    changes: list[ObjectChange] = dataclasses.field(default_factory=list)
+    speakers_changes: list[SpeakersChange] = dataclasses.field(default_factory=list)
+    submissions: list[dict[str, Any]] = dataclasses.field(default_factory=list)
+    speakers: list[dict[str, Any]] = dataclasses.field(default_factory=list)
+    session_speaker_codes: dict[str, list[str]] = dataclasses.field(
+        default_factory=dict
+    )
+    submission_hashes: dict[str, str] = dataclasses.field(default_factory=dict)
+    speaker_hashes: dict[str, str] = dataclasses.field(default_factory=dict)
+
+    def record_change(
+        self,
+        obj: models.PretalxSyncedModel,
+        old_values: dict[str, Any] | None,
+        changed_fields: set[str],
+    ) -> None:
+        """
+        Records changes of the object, ``old_values`` are ``None`` for objects
+        that will be created.
+        """
+        if old_values is not None and not changed_fields:
+            return
+
+        new_values = obj.get_pretalx_values()
+        self.changes.append(
+            ObjectChange(
+                model=obj._meta.label,
+                pretalx_code=obj.pretalx_code,
+                action="update" if old_values is not None else "create",
+                fields={
+                    field: FieldChange(
+                        old=old_values[field] if old_values is not None else None,
+                        new=new_values[field],
+                    )
+                    for field in sorted(
+                        changed_fields if old_values is not None else new_values
+                    )
+                },
+            )
+        )
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.changes and not self.speakers_changes
+
+    def to_json(self) -> str:
+        return json.dumps(dataclasses.asdict(self), indent=2, default=str)
+
+    @classmethod
+    def from_json(cls, data: str) -> "SyncPlan":
+        plan_data = json.loads(data)
+        return cls(
+            event_slug=plan_data["event_slug"],
+            changes=[
+                ObjectChange(
+                    model=change["model"],
+                    pretalx_code=change["pretalx_code"],
+                    action=change["action"],
+                    fields={
+                        field: FieldChange(**field_change)
+                        for field, field_change in change["fields"].items()
+                    },
+                )
+                for change in plan_data["changes"]
+            ],
+            speakers_changes=[
+                SpeakersChange(**change) for change in plan_data["speakers_changes"]
+            ],
+            submissions=plan_data["submissions"],
+            speakers=plan_data["speakers"],
+            session_speaker_codes=plan_data["session_speaker_codes"],
+            submission_hashes=plan_data["submission_hashes"],
+            speaker_hashes=plan_data["speaker_hashes"],
+        )
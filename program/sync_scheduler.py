@@ -0,0 +1,223 @@
+import datetime
+import logging
+import queue
+import threading
+import time
+from collections.abc import AsyncIterable, Callable, Iterable, Iterator, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Stage:
+    name: str
+    func: Callable[..., Any]
+    depends_on: Sequence[str]
+    in_background: bool
+
+
+@dataclass
+class StageTiming:
+    name: str
+    started: float
+    """Start of the stage in seconds since the start of the scheduler."""
+    duration: float
+    """Duration of the stage in seconds."""
+
+    @property
+    def finished(self) -> float:
+        return self.started + self.duration
+
+
+_END = object()
+
+
+class BoundedStream:
+    """
+    Items passed from a background stage to a later stage while they are
+    produced. At most ``max_size`` items are buffered, the producer waits until
+    the consumer catches up, so memory does not depend on the number of items.
+
+    The stream is iterated by the consumer. An error of the producer is raised
+    by the iteration after the items produced before the error.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._queue: queue.Queue = queue.Queue(maxsize=max_size)
+        self._cancelled = threading.Event()
+
+    def produce(self, items: Iterable[Any]) -> None:
+        """Puts all items to the stream, to be called by the producing stage."""
+        try:
+            for item in items:
+                if not self.put(item):
+                    return
+        except BaseException as exc:
+            self.finish(error=exc)
+            raise
+        self.finish()
+
+    async def produce_async(self, items: AsyncIterable[Any]) -> None:
+        """
+        Async variant of ``produce()``. Putting an item blocks the event loop
+        while the buffer is full, so the loop must not be shared with other work.
+        """
+        try:
+            async for item in items:
+                if not self.put(item):
+                    return
+        except BaseException as exc:
+            self.finish(error=exc)
+            raise
+        self.finish()
+
+    def put(self, item: Any) -> bool:
+        """
+        Puts the item to the stream, waits while the buffer is full. Returns
+        False when the stream was cancelled, the producer should stop.
+        """
+        if self._cancelled.is_set():
+            return False
+        self._queue.put(item)
+        return not self._cancelled.is_set()
+
+    def finish(self, error: BaseException | None = None) -> None:
+        """Marks the end of the stream, optionally by an error of the producer."""
+        if not self._cancelled.is_set():
+            self._queue.put(error if error is not None else _END)
+
+    def cancel(self) -> None:
+        """Stops the producer, e.g. when the consumer failed."""
+        self._cancelled.set()
+        # Wake up the producer waiting for a free place in the buffer.
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            item = self._queue.get()
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+
+class SyncScheduler:
+    """
+    Runs stages of a synchronization in the order given by their dependencies,
+    independent stages overlap.
+
+    Each stage is called with results of the stages it depends on (in the order
+    of ``depends_on``). Background stages run in a pool of worker threads, they
+    are meant for network I/O and must not use the database: Django connections
+    are per-thread, so database writes would not share the caller's transaction.
+    The other stages run one by one in the calling thread.
+
+    Results of a background stage can be consumed while they are produced
+    through a stream created by ``add_stream()``, the consumer does not depend
+    on the producer then.
+    """
+
+    def __init__(self, max_workers: int = 2) -> None:
+        self.max_workers = max_workers
+        self.stages: dict[str, Stage] = {}
+        self.streams: list[BoundedStream] = []
+        self.timings: dict[str, StageTiming] = {}
+        self.started_at: datetime.datetime | None = None
+
+    def add(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        depends_on: Sequence[str] = (),
+        in_background: bool = False,
+    ) -> None:
+        if name in self.stages:
+            raise ValueError(f"Stage {name!r} already exists.")
+        missing = [
+            dependency for dependency in depends_on if dependency not in self.stages
+        ]
+        if missing:
+            # Requiring dependencies to be added first also rules out cycles.
+            raise ValueError(f"Stage {name!r} depends on unknown stages: {missing}")
+        self.stages[name] = Stage(name, func, depends_on, in_background)
+
+    def add_stream(self, max_size: int) -> BoundedStream:
+        """
+        Creates a stream between stages. Streams are cancelled when the run
+        ends, so producers waiting for a failed consumer do not block forever.
+        """
+        stream = BoundedStream(max_size)
+        self.streams.append(stream)
+        return stream
+
+    def run(self) -> dict[str, Any]:
+        """Runs all stages and returns their results by stage name."""
+        results: dict[str, Any] = {}
+        waiting = dict(self.stages)
+        running: dict[Future, str] = {}
+        self.started_at = datetime.datetime.now(datetime.timezone.utc)
+        started_at = time.perf_counter()
+
+        def run_stage(stage: Stage) -> Any:
+            stage_started_at = time.perf_counter()
+            result = stage.func(*(results[name] for name in stage.depends_on))
+            self.timings[stage.name] = StageTiming(
+                name=stage.name,
+                started=stage_started_at - started_at,
+                duration=time.perf_counter() - stage_started_at,
+            )
+            logger.info(
+                "Stage %s finished in %.2f s.",
+                stage.name,
+                self.timings[stage.name].duration,
+            )
+            return result
+
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="sync-stage",
+        )
+        try:
+            while waiting or running:
+                ready = [
+                    stage
+                    for stage in waiting.values()
+                    if all(name in results for name in stage.depends_on)
+                ]
+                # Start all background stages first, so they overlap with the
+                # stage running in this thread.
+                for stage in ready:
+                    if stage.in_background:
+                        del waiting[stage.name]
+                        running[executor.submit(run_stage, stage)] = stage.name
+
+                foreground = next(
+                    (stage for stage in ready if not stage.in_background), None
+                )
+                if foreground is not None:
+                    del waiting[foreground.name]
+                    results[foreground.name] = run_stage(foreground)
+                elif running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        results[running.pop(future)] = future.result()
+                else:
+                    raise RuntimeError("Stages cannot be run, check dependencies.")
+
+                # Collect finished background stages without waiting.
+                for future in [future for future in running if future.done()]:
+                    results[running.pop(future)] = future.result()
+        finally:
+            for stream in self.streams:
+                stream.cancel()
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        return results
@@ -5,6 +5,7 @@ from django.views.generic import RedirectView
 from .views import (
     debug_og_image_for_talk,
     debug_og_image_for_workshop,
+    pretalx_webhook,
     schedule_day,
     schedule_json,
     schedule_redirect,
@@ -28,6 +29,8 @@ urlpatterns = [
     path("schedule/", schedule_redirect, name="schedule_redirect"),
     path("schedule/<str:conference_day>/", schedule_day, name="schedule_day"),
     path("schedule.json", schedule_json, name="schedule_json"),
+    # Notifications about changes in pretalx
+    path("pretalx-webhook/", pretalx_webhook, name="pretalx_webhook"),
 ]
 
 # Routes for previewing OG images template.
@@ -1,15 +1,32 @@
+import dataclasses
 import datetime
+import functools
+import hmac
+import json
 import re
 
-from django.db.models import Prefetch
-from django.http import Http404, HttpRequest, JsonResponse
+from django.conf import settings
+from django.http import (
+    Http404,
+    HttpRequest,
+    HttpResponseBadRequest,
+    HttpResponseForbidden,
+    HttpResponseGone,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404, redirect
 from django.template.loader import render_to_string
 from django.template.response import HttpResponse, TemplateResponse
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition, require_POST
 
-from program.models import Slot, Speaker, Talk, Workshop
+from program import jobs, schedule_snapshot
+from program.models import Talk, Workshop
 from program.schedule_grid import ScheduleGrid
+from program.schedule_json import SESSION_FIELDS, ScheduleQuery
 
 # Note: conference days are currently hardcoded.
 # We could build the list directly from the database to make the code more
@@ -21,6 +38,44 @@ CONFERENCE_DAYS = {
 }
 
 
+def get_schedule_etag(request: HttpRequest, *args, **kwargs) -> str:
+    # Pages depend on templates too, they change with a new release.
+    return f"{schedule_snapshot.get_version()}-{settings.RELEASE}"
+
+
+def get_schedule_last_modified(
+    request: HttpRequest, *args, **kwargs
+) -> datetime.datetime:
+    return schedule_snapshot.get_changed_at(schedule_snapshot.get_version())
+
+
+def schedule_condition(view_func):
+    """
+    Answers conditional requests of schedule views using the version of program
+    data, so unchanged data are confirmed by HTTP 304 without any database query.
+    Browsers and proxies may reuse responses for ``SCHEDULE_MAX_AGE`` seconds.
+    """
+    conditional_view = condition(
+        etag_func=get_schedule_etag,
+        last_modified_func=get_schedule_last_modified,
+    )(view_func)
+
+    @functools.wraps(view_func)
+    def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        response = conditional_view(request, *args, **kwargs)
+        if response.status_code in {200, 304}:
+            patch_cache_control(
+                response, public=True, max_age=settings.SCHEDULE_MAX_AGE
+            )
+        else:
+            # Errors (e.g. invalid parameters) must not be cached by proxies.
+            response.headers.pop("ETag", None)
+            response.headers.pop("Last-Modified", None)
+        return response
+
+    return wrapper
+
+
 def session_detail(request, type, session_id: int):
     model_map = dict(talk=Talk, panel=Talk, workshop=Workshop, sprint=Workshop)
     session = get_object_or_404(
@@ -29,7 +84,8 @@ def session_detail(request, type, session_id: int):
 
     # Database allows adding a session to multiple slots.
     # First slot is the talk itself, other slots are for streaming to other rooms.
-    session_slot = session.slot_set.order_by("start", "room__order").first()
+    snapshot = schedule_snapshot.get_snapshot()
+    session_slot = snapshot.get_session_slot(session)
 
     session_previous = (
         model_map.get(type)
@@ -70,35 +126,10 @@ def session_detail(request, type, session_id: int):
                 current_day = day
                 break
 
-        schedule_slots = (
-            Slot.objects.filter(
-                start__gte=session_slot.start - datetime.timedelta(hours=1),
-                start__lte=session_slot.start + datetime.timedelta(hours=1),
-            )
-            .select_related(
-                "room",
-            )
-            .prefetch_related(
-                "talk",
-                Prefetch(
-                    "talk__talk_speakers",
-                    queryset=Speaker.objects.filter(is_public=True),
-                    to_attr="public_speakers",
-                ),
-                "workshop",
-                Prefetch(
-                    "workshop__workshop_speakers",
-                    queryset=Speaker.objects.filter(is_public=True),
-                    to_attr="public_speakers",
-                ),
-                "utility",
-            )
-            .order_by(
-                "start",
-                "room__order",
-            )
+        schedule_slots = snapshot.get_slots_between(
+            session_slot.start - datetime.timedelta(hours=1),
+            session_slot.start + datetime.timedelta(hours=1),
         )
-
         schedule_grid = ScheduleGrid.create_from_slots(schedule_slots)
         # Remove leading grid rows that contains only breaks and other
         # non-streamed utilities
@@ -167,125 +198,131 @@ def schedule_redirect(request) -> HttpResponse:
     return response
 
 
+@schedule_condition
 def schedule_day(request: HttpRequest, conference_day: str) -> HttpResponse:
     try:
         schedule_date = CONFERENCE_DAYS[conference_day]
     except KeyError:
         raise Http404()
 
-    slots = (
-        Slot.objects.filter(start__date=schedule_date)
-        .select_related("room")
-        .prefetch_related(
-            "talk",
-            Prefetch(
-                "talk__talk_speakers",
-                queryset=Speaker.objects.filter(is_public=True),
-                to_attr="public_speakers",
-            ),
-            "workshop",
-            Prefetch(
-                "workshop__workshop_speakers",
-                queryset=Speaker.objects.filter(is_public=True),
-                to_attr="public_speakers",
-            ),
-            "utility",
-        )
-        .order_by(
-            "start",
-            "room__order",
-        )
-    )
-
-    schedule_grid = ScheduleGrid.create_from_slots(slots)
+    # The grid is shared by all requests, see `ScheduleSnapshot`.
+    snapshot = schedule_snapshot.get_snapshot()
+    schedule_grid = snapshot.get_day_grid(schedule_date)
 
     return TemplateResponse(
         request,
         template="program/schedule_day.html",
         context={
             "schedule_date": schedule_date,
-            "slots": slots,
             "all_days": CONFERENCE_DAYS,
             "current_day": conference_day,
             "grid": schedule_grid,
+            # Rendered grid is cached for the version of the program data.
+            "schedule_version": snapshot.version,
+            "schedule_cache_timeout": schedule_snapshot.SNAPSHOT_TIMEOUT,
+            "release": settings.RELEASE,
         },
     )
 
 
-def schedule_json(request):
-    all_slots = (
-        Slot.objects.select_related("room")
-        .prefetch_related(
-            "talk",
-            Prefetch(
-                "talk__talk_speakers",
-                queryset=Speaker.objects.filter(is_public=True),
-                to_attr="public_speakers",
-            ),
-            "workshop",
-            Prefetch(
-                "workshop__workshop_speakers",
-                queryset=Speaker.objects.filter(is_public=True),
-                to_attr="public_speakers",
-            ),
-            "utility",
-        )
-        .order_by(
-            "start",
-            "room__order",
-        )
+@schedule_condition
+def schedule_json(request: HttpRequest) -> HttpResponse:
+    """
+    Program in JSON. Optional query parameters:
+
+    * ``day``: name of a conference day (e.g. ``friday``),
+    * ``room``: slug of a room,
+    * ``fields``: comma separated fields of sessions (see
+      ``program.schedule_json.SESSION_FIELDS``), e.g. without ``abstract``,
+    * ``since``: ``version`` of a previous response, only slots changed since then
+      are returned and IDs of ``removed`` slots are added. HTTP 410 is returned
+      when changes since the version are not known anymore, the client has to
+      request the full schedule.
+    """
+    try:
+        query = parse_schedule_query(request)
+    except ValueError as exc:
+        return HttpResponseBadRequest(f"Invalid parameter: {exc}")
+
+    snapshot = schedule_snapshot.get_snapshot()
+    if query.since is not None and query.since < snapshot.json.tracked_since:
+        return HttpResponseGone("Changes since the version are not known.")
+    return StreamingHttpResponse(
+        snapshot.json.encode(query), content_type="application/json"
     )
 
-    schedule_grid = ScheduleGrid.create_from_slots(all_slots)
-    result = []
-    for row in schedule_grid.rows:
-        for item in row.items:
-            session = item.slot.event
-            session_json = {
-                "title": session.title,
-            }
-            if isinstance(session, (Talk, Workshop)):
-                session_json.update(
-                    {
-                        "type": session.type,
-                        "abstract": session.abstract,
-                        "track": session.track,
-                        "language": session.language,
-                        "minimum_python_knowledge": session.minimum_python_knowledge,
-                        "minimum_topic_knowledge": session.minimum_topic_knowledge,
-                        "speakers": [
-                            {
-                                "name": speaker.full_name,
-                                "twitter": speaker.twitter if speaker.twitter else None,
-                                "github": speaker.github if speaker.github else None,
-                                "linkedin": speaker.linkedin
-                                if speaker.linkedin
-                                else None,
-                                "personal_website": speaker.personal_website
-                                if speaker.personal_website
-                                else None,
-                            }
-                            for speaker in session.speakers
-                        ],
-                    }
-                )
-            else:
-                session_json["type"] = "other"
-
-            slot_json = {
-                "start": item.slot.start.isoformat(),
-                "end": item.slot.end.isoformat(),
-                "room": item.slot.room.label,
-                "is_streamed": item.is_streamed,
-                "session": session_json,
-            }
-            result.append(slot_json)
-
-    return JsonResponse(
-        {
-            "schedule": result,
-        }
-    )
+
+def parse_schedule_query(request: HttpRequest) -> ScheduleQuery:
+    query = ScheduleQuery()
+    if day := request.GET.get("day"):
+        if day not in CONFERENCE_DAYS:
+            raise ValueError(f"unknown day {day!r}")
+        query = dataclasses.replace(query, date=CONFERENCE_DAYS[day])
+    if room := request.GET.get("room"):
+        query = dataclasses.replace(query, room=room)
+    if "fields" in request.GET:
+        fields = tuple(
+            field.strip() for field in request.GET["fields"].split(",") if field.strip()
+        )
+        unknown = set(fields) - set(SESSION_FIELDS)
+        if unknown:
+            raise ValueError(f"unknown fields {', '.join(sorted(unknown))}")
+        query = dataclasses.replace(query, fields=fields)
+    if since := request.GET.get("since"):
+        query = dataclasses.replace(query, since=int(since))
+    return query
+
+
+PRETALX_WEBHOOK_JOB_KINDS = {
+    "submission": "sync_submissions",
+    "speaker": "sync_speakers",
+}
+
+
+@csrf_exempt
+@require_POST
+def pretalx_webhook(request: HttpRequest) -> HttpResponse:
+    """
+    Accepts notifications about changed pretalx submissions and speakers.
+
+    The request must be authenticated by the ``Authorization: Bearer <secret>``
+    header with ``PRETALX_WEBHOOK_SECRET``. The body is a JSON object like
+    ``{"type": "submission", "code": "ABCDEF"}``, or a list of such objects.
+    An optional ``"event"`` key selects the pretalx event, ``PRETALX_EVENT_SLUG``
+    is used by default.
+    Changed objects are synchronized later by a background job, see
+    ``jobs.enqueue_changes()``.
+    """
+    if not settings.PRETALX_WEBHOOK_SECRET:
+        raise Http404("pretalx webhook is not configured.")
+
+    authorization = request.headers.get("Authorization", "")
+    expected = f"Bearer {settings.PRETALX_WEBHOOK_SECRET}"
+    if not hmac.compare_digest(authorization.encode(), expected.encode()):
+        return HttpResponseForbidden("Invalid webhook secret.")
+
+    try:
+        notifications = json.loads(request.body)
+        if isinstance(notifications, dict):
+            notifications = [notifications]
+        changed_codes: dict[tuple[str, str], set[str]] = {}
+        for notification in notifications:
+            kind = PRETALX_WEBHOOK_JOB_KINDS[notification["type"]]
+            code = notification["code"]
+            if not isinstance(code, str) or not code:
+                raise ValueError(f"Invalid code: {code!r}")
+            event_slug = notification.get("event", settings.PRETALX_EVENT_SLUG)
+            if not isinstance(event_slug, str) or not event_slug:
+                raise ValueError(f"Invalid event: {event_slug!r}")
+            changed_codes.setdefault((kind, event_slug), set()).add(code)
+    except (ValueError, TypeError, KeyError) as exc:
+        return HttpResponseBadRequest(f"Invalid notification: {exc}")
+
+    job_ids = [
+        jobs.enqueue_changes(kind, codes, event_slug).id
+        for (kind, event_slug), codes in changed_codes.items()
+    ]
+    return JsonResponse({"jobs": job_ids}, status=202)
 
 
 def debug_og_image_for_talk(request, session_id: int) -> HttpResponse:
@@ -165,6 +165,31 @@ APPEND_SLASH = True
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "data/mediafiles")
 
+# Release of the application, set during deployment.
+RELEASE = os.getenv("SENTRY_RELEASE", "dev")
+
+# Cache settings
+# The "program" cache keeps the schedule snapshot (see program/schedule_snapshot.py),
+# it must be shared by all processes (gunicorn workers and the job worker).
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "program": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv(
+            "PROGRAM_CACHE_DIR", os.path.join(BASE_DIR, "data/program-cache")
+        ),
+        # Every version of the program data adds a snapshot and rendered days,
+        # they expire after a day. The limit must not be reached, culling could
+        # remove the history of slot changes used by schedule.json.
+        "OPTIONS": {"MAX_ENTRIES": 10_000},
+        # The cache is kept on a persistent volume, pickled snapshots of previous
+        # releases must not be used.
+        "KEY_PREFIX": RELEASE,
+    },
+}
+
 CSRF_TRUSTED_ORIGINS = [
     "https://pycon-cz-beta.fly.dev",
     "https://pycon-cz-prod.fly.dev",
@@ -203,7 +228,7 @@ if "SENTRY_DSN" in os.environ:
 
     sentry_sdk.init(
         dsn=os.getenv("SENTRY_DSN"),
-        release=os.getenv("SENTRY_RELEASE", "dev"),
+        release=RELEASE,
         environment=os.getenv("SENTRY_ENVIRONMENT", "development"),
         integrations=[
             DjangoIntegration(),
@@ -214,5 +239,21 @@ if "SENTRY_DSN" in os.environ:
 
 
 # Settings for pretalx integration
-PRETALX_EVENT_SLUG = os.getenv('PRETALX_EVENT_SLUG', 'pycon-cz-23')
-PRETALX_TOKEN = os.getenv('PRETALX_TOKEN', None)
+PRETALX_EVENT_SLUG = os.getenv("PRETALX_EVENT_SLUG", "pycon-cz-23")
+PRETALX_TOKEN = os.getenv("PRETALX_TOKEN", None)
+PRETALX_POOL_SIZE = int(os.getenv("PRETALX_POOL_SIZE", "10"))
+PRETALX_RATE_LIMIT = float(os.getenv("PRETALX_RATE_LIMIT", "10"))
+PRETALX_RATE_BURST = int(os.getenv("PRETALX_RATE_BURST", "10"))
+PRETALX_CACHE_DIR = os.getenv("PRETALX_CACHE_DIR", None)
+PRETALX_OFFLINE = os.getenv("PRETALX_OFFLINE", "false").casefold() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+    "enabled",
+}
+PRETALX_WEBHOOK_SECRET = os.getenv("PRETALX_WEBHOOK_SECRET", None)
+PRETALX_WEBHOOK_DEBOUNCE = float(os.getenv("PRETALX_WEBHOOK_DEBOUNCE", "10"))
+
+# Settings for the schedule
+SCHEDULE_MAX_AGE = int(os.getenv("SCHEDULE_MAX_AGE", "60"))
@@ -0,0 +1,17 @@
+import pytest
+from django.core.cache import caches
+
+from program import schedule_snapshot
+from tests.fake_pretalx import FakePretalx
+
+
+@pytest.fixture
+def fake_pretalx() -> FakePretalx:
+    return FakePretalx(submissions_count=50)
+
+
+@pytest.fixture(autouse=True)
+def clear_program_cache() -> None:
+    # Database changes of a test are rolled back without any signals,
+    # a schedule snapshot must not survive to the next test.
+    caches[schedule_snapshot.CACHE_ALIAS].clear()
@@ -0,0 +1,215 @@
+"""
+In-process fake of the pretalx REST API.
+
+``FakePretalx`` is a ``requests`` transport adapter, mount it to the session of
+``PretalxClient`` to serve generated speakers and submissions without network
+access (tests run with ``--disable-socket``).
+"""
+import json
+import re
+import urllib.parse
+from typing import Any
+
+import requests
+from requests.adapters import BaseAdapter
+
+from program import pretalx
+
+API_BASE_URL = "https://pretalx.test/api/"
+MEDIA_URL = "https://pretalx.test/media/"
+EVENT_SLUG = "fake-event"
+
+URL_RE = re.compile(
+    r"/api/events/(?P<event>[^/]+)/(?P<resource>submissions|speakers)/(?P<code>[^/]*)$"
+)
+
+
+def make_speaker(index: int) -> dict[str, Any]:
+    return {
+        "code": f"SP{index:05d}",
+        "name": f"Speaker {index}",
+        "biography": f"Biography of speaker {index}",
+        "email": f"speaker{index}@example.com",
+        "avatar": None,
+        "answers": [
+            {
+                "question": {"id": 1, "question": {"en": "Your GitHub"}},
+                "answer": f"https://github.com/speaker{index}",
+            },
+            {
+                "question": {"id": 2, "question": {"en": "Your Twitter"}},
+                "answer": "",
+            },
+        ],
+    }
+
+
+def make_submission(index: int, speakers_count: int) -> dict[str, Any]:
+    """
+    Every fifth submission is a workshop, every other one has two speakers.
+    """
+    submission_type = "Workshop" if index % 5 == 0 else "Talk"
+    return {
+        "code": f"SU{index:05d}",
+        "title": f"Submission {index}",
+        "description": f"Abstract of submission {index}",
+        "internal_notes": "",
+        "state": pretalx.SubmissionState.CONFIRMED.value,
+        "track": {"en": "General"},
+        "submission_type": {"en": submission_type},
+        "duration": 120 if submission_type == "Workshop" else 30,
+        "speakers": [
+            {"code": f"SP{(index + offset) % speakers_count:05d}"}
+            for offset in range(1 + index % 2)
+        ],
+        "answers": [
+            {
+                "question": {"id": 10, "question": {"en": "Language of your session"}},
+                "answer": "English (preferred for the rest of talks and workshops)",
+            },
+            {
+                "question": {
+                    "id": 11,
+                    # pretalx really uses a non-breaking space here.
+                    "question": {"en": "Minimum recommended Python\xa0knowledge"},
+                },
+                "answer": "Intermediate: uses frameworks and third-party libraries",
+            },
+            {
+                "question": {"id": 12, "question": {"en": "Number of participants"}},
+                "answer": "20",
+            },
+        ],
+    }
+
+
+class FakePretalx(BaseAdapter):
+    """
+    Serves ``submissions_count`` submissions and ``speakers_count`` speakers
+    (same as submissions by default) with pagination, state filter and ETags.
+
+    Served data can be modified through the ``submissions`` and ``speakers``
+    lists, URLs of all received requests are kept in ``requests`` and requests
+    answered with HTTP 304 are counted in ``not_modified``. The same data
+    are served for all events in ``event_slugs``. Files (e.g. avatars) are served
+    from ``files`` keyed by URLs under ``MEDIA_URL``. The next ``rate_limited``
+    requests are refused with HTTP 429, the next ``server_errors`` requests fail
+    with HTTP 503.
+    """
+
+    def __init__(
+        self,
+        submissions_count: int = 50,
+        speakers_count: int | None = None,
+        event_slugs: tuple[str, ...] = (EVENT_SLUG,),
+    ):
+        super().__init__()
+        self.event_slugs = event_slugs
+        speakers_count = speakers_count or submissions_count
+        self.speakers = [make_speaker(index) for index in range(speakers_count)]
+        self.submissions = [
+            make_submission(index, speakers_count) for index in range(submissions_count)
+        ]
+        self.files: dict[str, bytes] = {}
+        self.requests: list[str] = []
+        self.not_modified = 0
+        self.rate_limited = 0
+        self.server_errors = 0
+
+    def create_client(
+        self, event_slug: str = EVENT_SLUG, **kwargs
+    ) -> pretalx.PretalxClient:
+        client = pretalx.PretalxClient(
+            event_slug=event_slug,
+            token="fake-token",
+            api_base_url=API_BASE_URL,
+            **kwargs,
+        )
+        client._session.mount(API_BASE_URL, self)
+        client._session.mount(MEDIA_URL, self)
+        return client
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        self.requests.append(request.url)
+        if self.rate_limited > 0:
+            self.rate_limited -= 1
+            response = self._create_response(request, 429, {"detail": "Throttled."})
+            response.headers["Retry-After"] = "0"
+            return response
+        if self.server_errors > 0:
+            self.server_errors -= 1
+            return self._create_response(request, 503, {"detail": "Unavailable."})
+
+        if request.url.startswith(MEDIA_URL):
+            if request.url not in self.files:
+                return self._create_response(request, 404, {"detail": "Not found."})
+            return self._create_response(request, 200, content=self.files[request.url])
+
+        url = urllib.parse.urlsplit(request.url)
+        query = urllib.parse.parse_qs(url.query)
+        match = URL_RE.search(url.path)
+        if match is None or match["event"] not in self.event_slugs:
+            return self._create_response(request, 404, {"detail": "Not found."})
+
+        if match["resource"] == "submissions":
+            items = self.submissions
+            if "state" in query:
+                items = [item for item in items if item["state"] in query["state"]]
+        else:
+            items = self.speakers
+
+        if match["code"]:
+            found = [item for item in items if item["code"] == match["code"]]
+            if not found:
+                return self._create_response(request, 404, {"detail": "Not found."})
+            return self._create_response(request, 200, found[0])
+
+        limit = int(query.get("limit", ["50"])[0])
+        offset = int(query.get("offset", ["0"])[0])
+        next_url = None
+        if offset + limit < len(items):
+            next_query = dict(query, offset=[str(offset + limit)], limit=[str(limit)])
+            next_url = urllib.parse.urlunsplit(
+                url._replace(query=urllib.parse.urlencode(next_query, doseq=True))
+            )
+        return self._create_response(
+            request,
+            200,
+            {
+                "count": len(items),
+                "next": next_url,
+                "previous": None,
+                "results": items[offset : offset + limit],
+            },
+        )
+
+    def close(self) -> None:
+        pass
+
+    def _create_response(
+        self,
+        request: requests.PreparedRequest,
+        status_code: int,
+        data: Any = None,
+        content: bytes | None = None,
+    ) -> requests.Response:
+        if content is None:
+            content = json.dumps(data).encode()
+            content_type = "application/json"
+        else:
+            content_type = "application/octet-stream"
+        etag = f'"{pretalx.hash_payload({"content": content.hex()})[:16]}"'
+
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.headers["Content-Type"] = content_type
+        response.headers["ETag"] = etag
+        if status_code == 200 and request.headers.get("If-None-Match") == etag:
+            response.status_code = 304
+            self.not_modified += 1
+            response._content = b""
+        else:
+            response.status_code = status_code
+            response._content = content
+        return response
@@ -3,3 +3,16 @@ from settings import *
 DATABASES = {
     "default": dj_database_url.parse("sqlite://:memory:"),
 }
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "program": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "program",
+    },
+}
+
+# Tests do not run collectstatic, the manifest is not available.
+STATICFILES_STORAGE = "django.contrib.staticfiles.storage.StaticFilesStorage"
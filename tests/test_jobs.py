@@ -0,0 +1,171 @@
+import datetime
+
+import pytest
+from django.db import OperationalError
+from django.utils import timezone
+from pytest import mark, raises
+
+from program import jobs, pretalx, pretalx_sync
+from program.models import Speaker, SyncJob, Talk
+from tests.fake_pretalx import EVENT_SLUG, FakePretalx
+
+
+@pytest.fixture(autouse=True)
+def pretalx_client(fake_pretalx: FakePretalx, monkeypatch, settings) -> None:
+    settings.PRETALX_EVENT_SLUG = EVENT_SLUG
+    settings.PRETALX_WEBHOOK_DEBOUNCE = 0
+    monkeypatch.setattr(
+        pretalx,
+        "create_pretalx_client",
+        lambda event_slug=None: fake_pretalx.create_client(event_slug or EVENT_SLUG),
+    )
+
+
+@mark.django_db
+def test_enqueue_deduplicates_ids():
+    job = jobs.enqueue("update_talks", [3, 1, 3])
+
+    assert job.status == "pending"
+    assert job.object_ids == [1, 3]
+    assert job.total == 2
+    with raises(ValueError):
+        jobs.enqueue("delete_talks", [1])
+
+
+@mark.django_db
+def test_claim_next_job_skips_delayed_jobs():
+    delayed = jobs.enqueue("update_talks", [1])
+    delayed.run_after = timezone.now() + datetime.timedelta(minutes=1)
+    delayed.save()
+    due = jobs.enqueue("update_speakers", [1])
+
+    claimed = jobs.claim_next_job()
+
+    assert claimed == due
+    assert claimed.status == "running"
+    assert claimed.started_at is not None
+    assert jobs.claim_next_job() is None
+
+
+@mark.django_db
+def test_run_job_continues_after_progress():
+    job = jobs.enqueue_changes("sync_submissions", ["SU00001", "SU00002", "SU00003"])
+    job.progress = 1
+    job.save()
+
+    jobs.run_job(jobs.claim_next_job())
+
+    job.refresh_from_db()
+    assert job.status == "done"
+    assert job.progress == 3
+    assert job.finished_at is not None
+    assert set(Talk.objects.values_list("pretalx_code", flat=True)) == {
+        "SU00002",
+        "SU00003",
+    }
+
+
+@mark.django_db
+def test_run_job_records_error(monkeypatch):
+    def sync_submissions(self, codes):
+        raise ValueError("Broken submission.")
+
+    monkeypatch.setattr(pretalx_sync.PretalxSync, "sync_submissions", sync_submissions)
+    job = jobs.enqueue_changes("sync_submissions", ["SU00001"])
+
+    jobs.run_job(jobs.claim_next_job())
+
+    job.refresh_from_db()
+    assert job.status == "failed"
+    assert job.error == "ValueError: Broken submission."
+
+
+@mark.django_db
+def test_worker_requeues_stale_jobs():
+    stale = jobs.enqueue("update_talks", [])
+    recent = jobs.enqueue("update_talks", [])
+    SyncJob.objects.filter(id=stale.id).update(
+        status="running", started_at=timezone.now() - datetime.timedelta(hours=2)
+    )
+    SyncJob.objects.filter(id=recent.id).update(
+        status="running", started_at=timezone.now()
+    )
+
+    jobs.run_worker(poll_interval=0, once=True)
+
+    stale.refresh_from_db()
+    recent.refresh_from_db()
+    assert stale.status == "done"
+    assert recent.status == "running"
+
+
+class StopWorker(BaseException):
+    pass
+
+
+def test_worker_survives_errors(monkeypatch):
+    def run_next_job():
+        raise OperationalError("The connection was closed.")
+
+    closed_connections = []
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 2:
+            raise StopWorker()
+
+    monkeypatch.setattr(jobs, "requeue_stale_jobs", lambda: 0)
+    monkeypatch.setattr(jobs, "run_next_job", run_next_job)
+    monkeypatch.setattr(
+        jobs, "close_old_connections", lambda: closed_connections.append(True)
+    )
+    monkeypatch.setattr(jobs.time, "sleep", sleep)
+
+    with raises(StopWorker):
+        jobs.run_worker(poll_interval=5)
+
+    assert sleeps == [5, 5]
+    assert len(closed_connections) == 2
+
+
+@mark.django_db
+def test_coalesced_job_skips_unknown_codes(fake_pretalx: FakePretalx):
+    with fake_pretalx.create_client() as client:
+        pretalx_sync.PretalxSync(client).full_sync()
+    fake_pretalx.speakers[1]["name"] = "Renamed speaker"
+    jobs.enqueue_changes("sync_submissions", ["SU00001", "DELETED"])
+    jobs.enqueue_changes("sync_speakers", ["SP00001"])
+    jobs.enqueue_changes("sync_speakers", ["SP00002"])
+    fake_pretalx.speakers.pop(2)
+
+    while jobs.run_next_job():
+        pass
+
+    assert set(SyncJob.objects.values_list("status", flat=True)) == {"done"}
+    assert Speaker.objects.get(pretalx_code="SP00001").full_name == "Renamed speaker"
+
+
+@mark.django_db
+def test_changes_are_coalesced(settings):
+    settings.PRETALX_WEBHOOK_DEBOUNCE = 10
+    first = jobs.enqueue_changes("sync_submissions", ["SU00002", "SU00001"])
+    second = jobs.enqueue_changes("sync_submissions", ["SU00001", "SU00003"])
+    speakers = jobs.enqueue_changes("sync_speakers", ["SP00001"])
+
+    assert second.id == first.id
+    assert second.pretalx_codes == ["SU00001", "SU00002", "SU00003"]
+    assert second.total == 3
+    assert second.run_after >= first.run_after
+    assert speakers.id != first.id
+    # Changes are not synced before the debounce delay.
+    assert jobs.claim_next_job() is None
+
+
+@mark.django_db
+def test_coalescing_is_limited_by_max_delay(settings):
+    settings.PRETALX_WEBHOOK_DEBOUNCE = 600
+    job = jobs.enqueue_changes("sync_submissions", ["SU00001"])
+    job = jobs.enqueue_changes("sync_submissions", ["SU00002"])
+
+    assert job.run_after == job.created_at + jobs.WEBHOOK_MAX_DELAY
@@ -0,0 +1,138 @@
+import asyncio
+
+from pytest import raises
+
+from program import pretalx, pretalx_async
+from tests.fake_pretalx import MEDIA_URL, FakePretalx
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def test_rate_limiter_allows_burst_then_rate():
+    clock = FakeClock()
+    limiter = pretalx.RateLimiter(rate=2, burst=3, clock=clock, sleep=clock.sleep)
+
+    waits = [limiter.acquire() for _ in range(5)]
+
+    assert waits == [0, 0, 0, 0.5, 0.5]
+    assert clock.now == 1.0
+
+
+def test_rate_limiter_slows_down_after_429():
+    clock = FakeClock()
+    limiter = pretalx.RateLimiter(rate=4, burst=4, clock=clock, sleep=clock.sleep)
+
+    limiter.on_rate_limited(retry_after=3)
+
+    assert limiter.rate == 2
+    assert limiter.acquire() == 3.5
+    limiter.on_success()
+    assert limiter.rate == 2.2
+
+
+def test_client_retries_rate_limited_requests(fake_pretalx: FakePretalx):
+    limiter = pretalx.RateLimiter(rate=1000, burst=10)
+    fake_pretalx.rate_limited = 2
+    with fake_pretalx.create_client(rate_limiter=limiter) as client:
+        submissions = list(client.list_submissions())
+
+    assert len(submissions) == 50
+    assert limiter.rate < 1000
+    assert client.metrics.requests["submissions/"].errors == 2
+
+
+def test_get_submissions_lists_only_when_cheaper():
+    fake_pretalx = FakePretalx(submissions_count=500)
+    with fake_pretalx.create_client() as client:
+        few = client.get_submissions(["SU00001", "SU00100", "SU00200"])
+        few_requests = len(fake_pretalx.requests)
+        fake_pretalx.requests.clear()
+        many = client.get_submissions([f"SU{index:05d}" for index in range(0, 400, 20)])
+
+    assert set(few) == {"SU00001", "SU00100", "SU00200"}
+    # The first page contains SU00001, the others are fetched one by one.
+    assert few_requests == 3
+    assert len(many) == 20
+    # 10 pages of the list instead of 20 requests.
+    assert len(fake_pretalx.requests) == 10
+
+
+def test_cached_responses_are_revalidated(fake_pretalx: FakePretalx, tmp_path):
+    avatar_url = f"{MEDIA_URL}avatars/SP00001.png"
+    fake_pretalx.files[avatar_url] = b"\x89PNG avatar"
+    cache = pretalx.ResponseCache(tmp_path)
+    for _ in range(2):
+        with fake_pretalx.create_client(cache=cache) as client:
+            submissions = list(client.list_submissions())
+            avatar = client.get_file(avatar_url)
+
+    assert len(submissions) == 50
+    assert avatar == b"\x89PNG avatar"
+    # The second round sent the same requests, answered with 304.
+    assert len(fake_pretalx.requests) == 4
+    assert fake_pretalx.not_modified == 2
+
+
+def test_offline_client_replays_cached_responses(fake_pretalx: FakePretalx, tmp_path):
+    avatar_url = f"{MEDIA_URL}avatars/SP00001.png"
+    fake_pretalx.files[avatar_url] = b"\x89PNG avatar"
+    with fake_pretalx.create_client(cache=pretalx.ResponseCache(tmp_path)) as client:
+        list(client.list_submissions())
+        client.get_file(avatar_url)
+    fake_pretalx.requests.clear()
+
+    offline_cache = pretalx.ResponseCache(tmp_path, offline=True)
+    with fake_pretalx.create_client(cache=offline_cache) as client:
+        assert len(list(client.list_submissions())) == 50
+        assert client.get_file(avatar_url) == b"\x89PNG avatar"
+        with raises(pretalx.ResponseNotCachedError):
+            client.get_file(f"{MEDIA_URL}avatars/SP00002.png")
+
+    assert fake_pretalx.requests == []
+
+
+def test_async_client_returns_same_results():
+    fake_pretalx = FakePretalx(submissions_count=120)
+    with fake_pretalx.create_client() as client:
+        submissions = list(client.list_submissions())
+        fake_pretalx.requests.clear()
+
+        async def fetch():
+            async_client = pretalx_async.AsyncPretalxClient(client, max_concurrency=2)
+            listed = [
+                submission async for submission in async_client.list_submissions()
+            ]
+            fetched = await async_client.get_speakers(["SP00003", "SP00004"])
+            return listed, fetched
+
+        listed, fetched = asyncio.run(fetch())
+
+    assert listed == submissions
+    assert [speaker["name"] for speaker in fetched.values()] == [
+        "Speaker 3",
+        "Speaker 4",
+    ]
+    # Three pages of submissions and two speakers.
+    assert len(fake_pretalx.requests) == 5
+
+
+def test_client_retries_server_errors_through_limiter(fake_pretalx: FakePretalx):
+    clock = FakeClock()
+    limiter = pretalx.RateLimiter(rate=1, burst=1, clock=clock, sleep=clock.sleep)
+    fake_pretalx.server_errors = 2
+    with fake_pretalx.create_client(rate_limiter=limiter, backoff_factor=0) as client:
+        submission = client.get_submission("SU00001")
+
+    assert submission["code"] == "SU00001"
+    assert client.metrics.requests["submissions/{code}"].errors == 2
+    # Each of the three attempts waited for the limiter.
+    assert clock.now == 2.0
@@ -0,0 +1,172 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from pytest import mark, raises
+
+from program import pretalx_sync, sync_plan
+from program.models import PretalxSyncedModel, PretalxSyncState, Speaker, Talk, Workshop
+from tests.fake_pretalx import EVENT_SLUG, MEDIA_URL, FakePretalx
+
+
+@mark.django_db
+@mark.parametrize("concurrent_fetch", [False, True])
+def test_full_sync_creates_sessions_and_speakers(
+    fake_pretalx: FakePretalx, concurrent_fetch: bool
+):
+    with fake_pretalx.create_client() as client:
+        pretalx_sync.PretalxSync(client).full_sync(concurrent_fetch=concurrent_fetch)
+
+    assert Talk.objects.count() == 40
+    assert Workshop.objects.count() == 10
+    assert Speaker.objects.count() == 50
+
+    talk = Talk.objects.get(pretalx_code="SU00001")
+    assert talk.title == "Submission 1"
+    assert talk.minimum_python_knowledge == "intermediate"
+    assert set(talk.talk_speakers.values_list("pretalx_code", flat=True)) == {
+        "SP00001",
+        "SP00002",
+    }
+    assert Speaker.objects.get(pretalx_code="SP00001").github == (
+        "https://github.com/speaker1"
+    )
+
+
+@mark.django_db
+def test_incremental_sync_skips_unchanged(fake_pretalx: FakePretalx):
+    with fake_pretalx.create_client() as client:
+        pretalx_sync.PretalxSync(client).full_sync()
+
+        fake_pretalx.submissions[1]["title"] = "Changed title"
+        fake_pretalx.submissions[1]["speakers"] = [{"code": "SP00007"}]
+        sync = pretalx_sync.PretalxSync(client)
+        sync.full_sync(incremental=True)
+
+    talk = Talk.objects.get(pretalx_code="SU00001")
+    assert talk.title == "Changed title"
+    assert list(talk.talk_speakers.values_list("pretalx_code", flat=True)) == [
+        "SP00007"
+    ]
+    assert sync.metrics.rows["program.Talk"].updated == 1
+    assert sync.metrics.rows["program.Talk"].unchanged == 39
+
+
+@mark.django_db
+def test_update_talks_fetches_missing_speakers(fake_pretalx: FakePretalx):
+    with fake_pretalx.create_client() as client:
+        pretalx_sync.PretalxSync(client).full_sync()
+        Speaker.objects.all().delete()
+        talks = list(Talk.objects.all())
+
+        with CaptureQueriesContext(connection) as queries:
+            pretalx_sync.PretalxSync(client).update_talks(talks)
+
+    talk_speaker_codes = {
+        speaker["code"]
+        for submission in fake_pretalx.submissions
+        if submission["submission_type"]["en"] == "Talk"
+        for speaker in submission["speakers"]
+    }
+    assert set(Speaker.objects.values_list("pretalx_code", flat=True)) == (
+        talk_speaker_codes
+    )
+    # The number of queries does not depend on the number of talks or speakers.
+    assert len(queries) <= 10
+
+
+@mark.django_db
+def test_dry_run_plan_can_be_applied(fake_pretalx: FakePretalx):
+    with fake_pretalx.create_client() as client:
+        plan = sync_plan.SyncPlan(event_slug=EVENT_SLUG)
+        pretalx_sync.PretalxSync(client).full_sync(plan=plan)
+        assert Talk.objects.count() == 0
+
+        fake_pretalx.requests.clear()
+        saved_plan = sync_plan.SyncPlan.from_json(plan.to_json())
+        pretalx_sync.PretalxSync(client).apply_plan(saved_plan)
+
+    assert fake_pretalx.requests == []
+    assert Talk.objects.count() == 40
+    assert Speaker.objects.count() == 50
+
+
+@mark.django_db
+def test_events_are_synced_separately():
+    fake_pretalx = FakePretalx(submissions_count=10, event_slugs=(EVENT_SLUG, "next"))
+    with fake_pretalx.create_client() as client:
+        pretalx_sync.PretalxSync(client).full_sync(incremental=True)
+
+        fake_pretalx.submissions[1]["title"] = "Next year"
+        next_sync = pretalx_sync.PretalxSync(client.for_event("next"))
+        next_sync.full_sync(incremental=True)
+
+    # Codes are unique within an event only.
+    talks = Talk.objects.filter(pretalx_code="SU00001")
+    assert talks.count() == 2
+    assert talks.get(pretalx_event=EVENT_SLUG).title == "Submission 1"
+    assert talks.get(pretalx_event="next").title == "Next year"
+    assert Speaker.objects.filter(pretalx_event="next").count() == 10
+    assert set(PretalxSyncState.objects.values_list("event_slug", flat=True)) == {
+        EVENT_SLUG,
+        "next",
+    }
+    assert next_sync.metrics.rows["program.Talk"].created == 8
+
+
+@mark.django_db
+def test_update_talks_of_event_with_shared_codes():
+    fake_pretalx = FakePretalx(submissions_count=10, event_slugs=(EVENT_SLUG, "next"))
+    with fake_pretalx.create_client() as client:
+        pretalx_sync.PretalxSync(client).full_sync()
+        pretalx_sync.PretalxSync(client.for_event("next")).full_sync()
+
+        fake_pretalx.submissions[1]["title"] = "Next year"
+        talks = list(Talk.objects.filter(pretalx_event="next"))
+        pretalx_sync.PretalxSync(client.for_event("next")).update_talks(talks)
+
+    talks = Talk.objects.filter(pretalx_code="SU00001")
+    assert talks.get(pretalx_event=EVENT_SLUG).title == "Submission 1"
+    assert talks.get(pretalx_event="next").title == "Next year"
+
+
+def test_synced_model_must_implement_update():
+    with raises(TypeError):
+
+        class IncompleteModel(PretalxSyncedModel):
+            PRETALX_FIELDS = ["title"]
+
+
+@mark.django_db
+def test_speaker_photos_are_synced(fake_pretalx: FakePretalx, settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    for index in (1, 2, 3):
+        avatar_url = f"{MEDIA_URL}avatars/SP{index:05d}.png"
+        fake_pretalx.files[avatar_url] = b"\x89PNG same avatar"
+        fake_pretalx.speakers[index]["avatar"] = avatar_url
+    with fake_pretalx.create_client() as client:
+        pretalx_sync.PretalxSync(client).full_sync()
+        speaker = Speaker.objects.get(pretalx_code="SP00003")
+        speaker.photo = "speakers/uploaded.png"
+        speaker.save()
+
+        fake_pretalx.speakers[1]["avatar"] = None
+        fake_pretalx.speakers[2]["avatar"] = f"{MEDIA_URL}avatars/SP00002-new.png"
+        fake_pretalx.files[fake_pretalx.speakers[2]["avatar"]] = b"\x89PNG new avatar"
+        fake_pretalx.speakers[3]["avatar"] = f"{MEDIA_URL}avatars/SP00003-new.png"
+        fake_pretalx.requests.clear()
+        pretalx_sync.PretalxSync(client).full_sync()
+
+    # Only the changed avatar of the speaker without an uploaded photo.
+    assert [url for url in fake_pretalx.requests if "avatars" in url] == [
+        f"{MEDIA_URL}avatars/SP00002-new.png"
+    ]
+    removed, changed, uploaded = (
+        Speaker.objects.get(pretalx_code=f"SP{index:05d}") for index in (1, 2, 3)
+    )
+    assert not removed.photo
+    assert removed.pretalx_avatar_url == ""
+    assert changed.photo.read() == b"\x89PNG new avatar"
+    assert changed.photo.name.startswith(pretalx_sync.SPEAKER_PHOTO_PREFIX)
+    assert uploaded.photo.name == "speakers/uploaded.png"
+    # The same avatar of three speakers was stored once.
+    stored = sorted(path.name for path in (tmp_path / "speakers").iterdir())
+    assert len(stored) == 2
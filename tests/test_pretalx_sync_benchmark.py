@@ -0,0 +1,117 @@
+"""
+Benchmarks of ``PretalxSync`` against the fake pretalx API.
+
+Not run by default, use ``pytest -m benchmark``. Results are printed and, when
+``PRETALX_BENCHMARK_OUTPUT`` is set, appended to the given file as JSON lines,
+so they can be compared over time.
+"""
+import json
+import os
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from pytest import fixture, mark
+
+from program import pretalx_sync
+from program.models import Speaker, Talk
+from tests.fake_pretalx import FakePretalx
+
+SIZES = [50, 1_000, 10_000]
+
+pytestmark = [mark.benchmark, mark.django_db]
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    size: int
+    wall_time: float
+    """Seconds."""
+    queries: int
+    peak_memory: int
+    """Bytes allocated by Python at peak, see ``tracemalloc``."""
+
+
+@contextmanager
+def measure(name: str, size: int) -> Iterator[None]:
+    tracemalloc.start()
+    started_at = time.perf_counter()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            yield
+        wall_time = time.perf_counter() - started_at
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    report(BenchmarkResult(name, size, wall_time, len(queries), peak_memory))
+
+
+def report(result: BenchmarkResult) -> None:
+    print(
+        f"\n{result.name}[{result.size}]: {result.wall_time:.3f} s, "
+        f"{result.queries} queries, {result.peak_memory / 1024 / 1024:.1f} MiB peak"
+    )
+    output_path = os.getenv("PRETALX_BENCHMARK_OUTPUT")
+    if output_path:
+        with open(output_path, "a") as output:
+            output.write(json.dumps(asdict(result)) + "\n")
+
+
+@fixture(params=SIZES)
+def sized_pretalx(request) -> FakePretalx:
+    return FakePretalx(submissions_count=request.param)
+
+
+def run_synced(
+    fake_pretalx: FakePretalx, func: Callable[[pretalx_sync.PretalxSync], None]
+) -> None:
+    with fake_pretalx.create_client() as client:
+        pretalx_sync.PretalxSync(client).full_sync()
+        func(pretalx_sync.PretalxSync(client))
+
+
+def test_full_sync(sized_pretalx: FakePretalx):
+    size = len(sized_pretalx.submissions)
+    with sized_pretalx.create_client() as client:
+        with measure("full_sync", size):
+            pretalx_sync.PretalxSync(client).full_sync()
+
+    assert Talk.objects.count() + size // 5 == size
+
+
+def test_full_sync_incremental(sized_pretalx: FakePretalx):
+    size = len(sized_pretalx.submissions)
+
+    def sync_incremental(sync: pretalx_sync.PretalxSync) -> None:
+        with measure("full_sync_incremental", size):
+            sync.full_sync(incremental=True)
+
+    run_synced(sized_pretalx, sync_incremental)
+
+
+def test_update_talks(sized_pretalx: FakePretalx):
+    size = len(sized_pretalx.submissions)
+
+    def update_talks(sync: pretalx_sync.PretalxSync) -> None:
+        talks = list(Talk.objects.all())
+        with measure("update_talks", size):
+            sync.update_talks(talks)
+
+    run_synced(sized_pretalx, update_talks)
+
+
+def test_update_speakers(sized_pretalx: FakePretalx):
+    size = len(sized_pretalx.submissions)
+
+    def update_speakers(sync: pretalx_sync.PretalxSync) -> None:
+        speakers = list(Speaker.objects.all())
+        with measure("update_speakers", size):
+            sync.update_speakers(speakers)
+
+    run_synced(sized_pretalx, update_speakers)
@@ -0,0 +1,216 @@
+import datetime
+import json
+
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.http import HttpResponseBadRequest
+from django.test import override_settings
+from django.urls import reverse
+from pytest import mark
+
+import settings as project_settings
+from program import schedule_snapshot, views
+from program.models import Room, Slot, Speaker, Talk, Utility
+from program.schedule_grid import EventRecord, RoomRecord, ScheduleGrid, SlotRecord
+
+FRIDAY = datetime.datetime.fromisoformat("2023-09-15T10:00:00+02:00")
+
+
+def get_streamed_json(response) -> dict:
+    return json.loads(b"".join(response.streaming_content))
+
+
+@pytest.fixture
+def talk(db) -> Talk:
+    room = Room.objects.create(label="Big hall", slug="big-hall", order=1)
+    talk = Talk.objects.create(
+        title="Talk", abstract="Abstract", type="talk", track="general"
+    )
+    speaker = Speaker.objects.create(full_name="Speaker", bio="", email="s@e.com")
+    speaker.talks.add(talk)
+    lunch = Utility.objects.create(title="Lunch")
+    Slot.objects.create(
+        start=FRIDAY, end=FRIDAY + datetime.timedelta(minutes=30), talk=talk, room=room
+    )
+    Slot.objects.create(
+        start=FRIDAY + datetime.timedelta(minutes=30),
+        end=FRIDAY + datetime.timedelta(minutes=90),
+        utility=lunch,
+        room=room,
+    )
+    return talk
+
+
+@mark.django_db
+def test_schedule_json_is_served_from_snapshot(
+    client, talk: Talk, django_assert_num_queries
+):
+    client.get(reverse("program:schedule_json"))
+
+    with django_assert_num_queries(0):
+        response = client.get(reverse("program:schedule_json"))
+
+    schedule = get_streamed_json(response)["schedule"]
+    assert [slot["session"]["title"] for slot in schedule] == ["Talk", "Lunch"]
+    assert schedule[0]["session"]["speakers"][0]["name"] == "Speaker"
+
+
+@mark.django_db
+def test_snapshot_is_rebuilt_after_change(
+    talk: Talk, django_capture_on_commit_callbacks
+):
+    snapshot = schedule_snapshot.get_snapshot()
+    assert schedule_snapshot.get_snapshot() is snapshot
+
+    with django_capture_on_commit_callbacks(execute=True):
+        talk.title = "Changed"
+        talk.save()
+
+    new_snapshot = schedule_snapshot.get_snapshot()
+    assert new_snapshot.version != snapshot.version
+    assert new_snapshot.get_session_slot(talk).event.title == "Changed"
+    assert len(new_snapshot.get_day_grid(FRIDAY.date()).rows) == 2
+
+
+@mark.django_db
+def test_snapshot_is_not_shared_by_releases(talk: Talk):
+    # Test settings replace the caches, check the deployed configuration.
+    assert project_settings.CACHES["program"]["KEY_PREFIX"] == project_settings.RELEASE
+    snapshot = schedule_snapshot.get_snapshot()
+    next_release_caches = {
+        **settings.CACHES,
+        "program": {**settings.CACHES["program"], "KEY_PREFIX": "next-release"},
+    }
+
+    with override_settings(CACHES=next_release_caches):
+        cache = caches[schedule_snapshot.CACHE_ALIAS]
+        assert cache.get(schedule_snapshot.VERSION_KEY) is None
+        assert (
+            cache.get(schedule_snapshot.SNAPSHOT_KEY.format(version=snapshot.version))
+            is None
+        )
+
+
+@mark.django_db
+def test_unchanged_schedule_json_is_not_modified(
+    client, talk: Talk, django_assert_num_queries
+):
+    response = client.get(reverse("program:schedule_json"))
+    assert response.headers["Cache-Control"] == "public, max-age=60"
+
+    with django_assert_num_queries(0):
+        not_modified = client.get(
+            reverse("program:schedule_json"),
+            HTTP_IF_NONE_MATCH=response.headers["ETag"],
+        )
+    assert not_modified.status_code == 304
+    assert not_modified.headers["Last-Modified"] == response.headers["Last-Modified"]
+
+
+@mark.django_db
+def test_schedule_errors_are_not_cached(rf):
+    @views.schedule_condition
+    def invalid_view(request):
+        return HttpResponseBadRequest("Invalid")
+
+    response = invalid_view(rf.get("/"))
+
+    assert response.status_code == 400
+    assert "Cache-Control" not in response.headers
+    assert "ETag" not in response.headers
+
+
+@mark.django_db
+def test_schedule_json_variants(client, talk: Talk, django_capture_on_commit_callbacks):
+    response = client.get(
+        reverse("program:schedule_json"), {"day": "friday", "fields": "title"}
+    )
+    data = get_streamed_json(response)
+    assert [slot["session"] for slot in data["schedule"]] == [
+        {"title": "Talk"},
+        {"title": "Lunch"},
+    ]
+    other_room = client.get(reverse("program:schedule_json"), {"room": "other"})
+    assert get_streamed_json(other_room)["schedule"] == []
+    assert (
+        client.get(reverse("program:schedule_json"), {"fields": "foo"}).status_code
+        == 400
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Utility.objects.update(title="Dinner")
+        schedule_snapshot.invalidate()
+        Slot.objects.filter(talk=talk).delete()
+
+    changes = get_streamed_json(
+        client.get(reverse("program:schedule_json"), {"since": data["version"]})
+    )
+    assert [slot["session"]["title"] for slot in changes["schedule"]] == ["Dinner"]
+    assert len(changes["removed"]) == 1
+
+
+@mark.django_db
+def test_schedule_json_changes_are_gone_without_history(
+    client, talk: Talk, django_capture_on_commit_callbacks
+):
+    version = get_streamed_json(client.get(reverse("program:schedule_json")))["version"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        caches[schedule_snapshot.CACHE_ALIAS].delete(schedule_snapshot.SLOT_CHANGES_KEY)
+        schedule_snapshot.invalidate()
+
+    response = client.get(reverse("program:schedule_json"), {"since": version})
+    assert response.status_code == 410
+
+
+def test_grid_from_slot_records():
+    small = RoomRecord(id=2, label="Small", slug="small", order=2)
+    big = RoomRecord(id=1, label="Big", slug="big", order=1)
+    keynote = EventRecord(
+        kind="talk", id=1, title="Keynote", url="/", type="talk", is_keynote=True
+    )
+    talk = EventRecord(kind="talk", id=2, title="Talk", url="/", type="talk")
+    lunch = EventRecord(kind="utility", id=1, title="Lunch", url=None)
+    hour = datetime.timedelta(hours=1)
+    slots = [
+        SlotRecord(1, FRIDAY, FRIDAY + hour, big, keynote),
+        SlotRecord(2, FRIDAY, FRIDAY + hour, small, keynote),
+        SlotRecord(3, FRIDAY + hour, FRIDAY + 2 * hour, big, talk),
+        SlotRecord(4, FRIDAY + hour, FRIDAY + 2 * hour, small, lunch),
+    ]
+
+    grid = ScheduleGrid.create_from_slots(slots)
+
+    assert [column.room for column in grid.columns] == [big, small]
+    keynote_item, talk_item, lunch_item = [
+        item for row in grid.rows for item in row.items
+    ]
+    assert keynote_item.type == "keynote"
+    assert keynote_item.is_streamed
+    assert keynote_item.grid_area == "1 / 1 / 2 / 3"
+    assert talk_item.grid_area == "2 / 1 / 3 / 2"
+    assert lunch_item.is_utility
+    assert lunch_item.grid_area == "2 / 2 / 3 / 3"
+
+
+@mark.django_db
+def test_schedule_day_grid_is_cached(
+    client, talk: Talk, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    url = reverse("program:schedule_day", kwargs={"conference_day": "friday"})
+    assert "Lunch" in client.get(url).content.decode()
+
+    version = schedule_snapshot.get_version()
+    key = make_template_fragment_key(
+        "schedule_grid", ["friday", version, settings.RELEASE]
+    )
+    assert "Lunch" in caches[schedule_snapshot.CACHE_ALIAS].get(key)
+    with django_assert_num_queries(0):
+        client.get(url)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Utility.objects.filter(title="Lunch").update(title="Dinner")
+        schedule_snapshot.invalidate()
+    assert "Dinner" in client.get(url).content.decode()
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from program import sync_scheduler
+
+
+def test_stream_is_consumed_while_produced():
+    scheduler = sync_scheduler.SyncScheduler()
+    stream = scheduler.add_stream(max_size=2)
+    produced = []
+
+    def produce():
+        for item in range(10):
+            produced.append(item)
+            yield item
+
+    def consume():
+        # The producer is at most one item ahead of the buffer.
+        return [(item, len(produced) - item <= 4) for item in stream]
+
+    scheduler.add("produce", lambda: stream.produce(produce()), in_background=True)
+    scheduler.add("consume", consume)
+    results = scheduler.run()
+
+    assert results["consume"] == [(item, True) for item in range(10)]
+    assert set(scheduler.timings) == {"produce", "consume"}
+
+
+def test_producer_error_is_raised_by_consumer():
+    scheduler = sync_scheduler.SyncScheduler()
+    stream = scheduler.add_stream(max_size=2)
+    consumed = []
+
+    def produce():
+        yield 1
+        raise ValueError("Download failed.")
+
+    scheduler.add("produce", lambda: stream.produce(produce()), in_background=True)
+    scheduler.add("consume", lambda: consumed.extend(stream))
+
+    with pytest.raises(ValueError):
+        scheduler.run()
+    assert consumed == [1]
+
+
+def test_failed_consumer_stops_producer():
+    scheduler = sync_scheduler.SyncScheduler()
+    stream = scheduler.add_stream(max_size=1)
+
+    def produce():
+        item = 0
+        while True:
+            item += 1
+            yield item
+
+    def consume():
+        next(iter(stream))
+        raise ValueError("Write failed.")
+
+    scheduler.add("produce", lambda: stream.produce(produce()), in_background=True)
+    scheduler.add("consume", consume)
+
+    with pytest.raises(ValueError):
+        scheduler.run()
+
+
+def test_stream_is_produced_by_event_loop():
+    scheduler = sync_scheduler.SyncScheduler()
+    stream = scheduler.add_stream(max_size=2)
+
+    async def produce():
+        for item in range(10):
+            await asyncio.sleep(0)
+            yield item
+
+    scheduler.add(
+        "produce",
+        lambda: asyncio.run(stream.produce_async(produce())),
+        in_background=True,
+    )
+    scheduler.add("consume", lambda: list(stream))
+    results = scheduler.run()
+
+    assert results["consume"] == list(range(10))
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+from django.urls import reverse
+from pytest import mark
+
+from program.models import SyncJob
+
+SECRET = "webhook-secret"
+
+
+@pytest.fixture(autouse=True)
+def webhook_settings(settings) -> None:
+    settings.PRETALX_WEBHOOK_SECRET = SECRET
+    settings.PRETALX_EVENT_SLUG = "pycon-cz-23"
+
+
+def post_notification(client, data, secret: str = SECRET):
+    return client.post(
+        reverse("program:pretalx_webhook"),
+        data=json.dumps(data),
+        content_type="application/json",
+        HTTP_AUTHORIZATION=f"Bearer {secret}",
+    )
+
+
+@mark.django_db
+def test_webhook_enqueues_changes(client):
+    response = post_notification(
+        client,
+        [
+            {"type": "submission", "code": "ABCDEF"},
+            {"type": "submission", "code": "GHIJKL"},
+            {"type": "speaker", "code": "SPEAK1", "event": "other-event"},
+        ],
+    )
+
+    assert response.status_code == 202
+    jobs = {job.id: job for job in SyncJob.objects.all()}
+    assert set(response.json()["jobs"]) == set(jobs)
+    assert {
+        (job.kind, job.pretalx_event, tuple(job.pretalx_codes)) for job in jobs.values()
+    } == {
+        ("sync_submissions", "pycon-cz-23", ("ABCDEF", "GHIJKL")),
+        ("sync_speakers", "other-event", ("SPEAK1",)),
+    }
+
+
+@mark.django_db
+def test_webhook_requires_secret(client):
+    response = post_notification(
+        client, {"type": "submission", "code": "ABCDEF"}, secret="wrong"
+    )
+
+    assert response.status_code == 403
+    assert not SyncJob.objects.exists()
+
+
+@mark.django_db
+@mark.parametrize(
+    "data",
+    [
+        {"type": "talk", "code": "ABCDEF"},
+        {"type": "submission"},
+        {"type": "submission", "code": ""},
+        {"type": "submission", "code": "ABCDEF", "event": 42},
+        [{"type": "submission", "code": "ABCDEF"}, "invalid"],
+        "invalid",
+    ],
+)
+def test_webhook_rejects_invalid_payload(client, data):
+    response = post_notification(client, data)
+
+    assert response.status_code == 400
+    assert not SyncJob.objects.exists()
+
+
+@mark.django_db
+def test_webhook_is_disabled_without_secret(client, settings):
+    settings.PRETALX_WEBHOOK_SECRET = None
+
+    response = post_notification(client, {"type": "submission", "code": "ABCDEF"})
+
+    assert response.status_code == 404